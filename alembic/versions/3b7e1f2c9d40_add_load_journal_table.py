@@ -0,0 +1,40 @@
+"""Add load_journal table
+
+Revision ID: 3b7e1f2c9d40
+Revises: 9616b7446239
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7e1f2c9d40'
+down_revision: Union[str, None] = '9616b7446239'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('load_journal',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('archivo', sa.String(length=500), nullable=True),
+    sa.Column('tamano', sa.BigInteger(), nullable=True),
+    sa.Column('mtime_ns', sa.BigInteger(), nullable=True),
+    sa.Column('byte_offset', sa.BigInteger(), nullable=True),
+    sa.Column('filas', sa.BigInteger(), nullable=True),
+    sa.Column('completado', sa.Boolean(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_load_journal_id'), 'load_journal', ['id'], unique=False)
+    op.create_index(op.f('ix_load_journal_archivo'), 'load_journal', ['archivo'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_load_journal_archivo'), table_name='load_journal')
+    op.drop_index(op.f('ix_load_journal_id'), table_name='load_journal')
+    op.drop_table('load_journal')
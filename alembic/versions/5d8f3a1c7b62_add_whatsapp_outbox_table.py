@@ -0,0 +1,46 @@
+"""Add whatsapp_outbox table
+
+Revision ID: 5d8f3a1c7b62
+Revises: 7c4d2a9e5b18
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8f3a1c7b62'
+down_revision: Union[str, None] = '7c4d2a9e5b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'whatsapp_outbox',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('ticket_id', sa.Integer(), nullable=True),
+        sa.Column('telefono', sa.String(length=20), nullable=False),
+        sa.Column('tipo', sa.String(length=20), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=True),
+        sa.Column('estado', sa.String(length=20), nullable=False),
+        sa.Column('intentos', sa.Integer(), nullable=False),
+        sa.Column('proximo_intento', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('ultimo_error', sa.Text(), nullable=True),
+        sa.Column('enviado_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['ticket_id'], ['tickets.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_whatsapp_outbox_estado_proximo_intento', 'whatsapp_outbox', ['estado', 'proximo_intento'], unique=False)
+    op.create_index('ix_whatsapp_outbox_ticket_id', 'whatsapp_outbox', ['ticket_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_whatsapp_outbox_ticket_id', table_name='whatsapp_outbox')
+    op.drop_index('ix_whatsapp_outbox_estado_proximo_intento', table_name='whatsapp_outbox')
+    op.drop_table('whatsapp_outbox')
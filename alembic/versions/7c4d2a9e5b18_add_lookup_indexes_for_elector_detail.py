@@ -0,0 +1,28 @@
+"""Add lookup indexes for the elector detail join
+
+Revision ID: 7c4d2a9e5b18
+Revises: 3b7e1f2c9d40
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c4d2a9e5b18'
+down_revision: Union[str, None] = '3b7e1f2c9d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_centros_votacion_codificacion_nueva_cv', 'centros_votacion', ['codificacion_nueva_cv'], unique=False)
+    op.create_index('ix_geograficos_ubicacion', 'geograficos', ['codigo_estado', 'codigo_municipio', 'codigo_parroquia'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_geograficos_ubicacion', table_name='geograficos')
+    op.drop_index('ix_centros_votacion_codificacion_nueva_cv', table_name='centros_votacion')
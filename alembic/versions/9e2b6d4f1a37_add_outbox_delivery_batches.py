@@ -0,0 +1,30 @@
+"""Add delivery batches to whatsapp_outbox
+
+Revision ID: 9e2b6d4f1a37
+Revises: 5d8f3a1c7b62
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e2b6d4f1a37'
+down_revision: Union[str, None] = '5d8f3a1c7b62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('whatsapp_outbox', sa.Column('lote', sa.String(length=32), nullable=True))
+    op.add_column('whatsapp_outbox', sa.Column('orden', sa.Integer(), nullable=True))
+    op.create_index('ix_whatsapp_outbox_lote_orden', 'whatsapp_outbox', ['lote', 'orden'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_whatsapp_outbox_lote_orden', table_name='whatsapp_outbox')
+    op.drop_column('whatsapp_outbox', 'orden')
+    op.drop_column('whatsapp_outbox', 'lote')
@@ -15,6 +15,7 @@ from whatsapp_chatbot_python import GreenAPIBot, Notification
 from fastapi import HTTPException
 from app.schemas import CedulaRequest
 from app.main import get_db, send_message, send_qr_code, obtener_numero_contacto, enviar_contacto, verificar_cedula
+from app.send_scheduler import PRIORITY_TICKET
 
 API_INSTANCE = os.getenv("API_INSTANCE", "7103945340")
 API_TOKEN = os.getenv("API_TOKEN", "fb1cffd3cfa14663a0bf5760528293c3fc0993da4b8b4c19ac")
@@ -77,13 +78,13 @@ def obtener_cedula(notification: Notification) -> None:
                       f"¡Mucha suerte!\n" \
                       f"Lotto Bueno: ¡Tu mejor oportunidad de ganar!"
 
-            send_message(chat_id, message)
-            send_qr_code(chat_id, qr_buf)
+            asyncio.run(send_message(chat_id, message, PRIORITY_TICKET))
+            asyncio.run(send_qr_code(chat_id, qr_buf, PRIORITY_TICKET))
 
             phone_contact = obtener_numero_contacto(db)
             print(f"phone_contact: {phone_contact}")
             if phone_contact:
-                enviar_contacto(chat_id, phone_contact.split('@')[0], "Lotto", "Bueno", "Lotto Bueno Inc")
+                asyncio.run(enviar_contacto(chat_id, phone_contact.split('@')[0], "Lotto", "Bueno", "Lotto Bueno Inc", PRIORITY_TICKET))
 
             notification.answer("Gracias por registrarte. ¡Hasta pronto!")
             notification.state_manager.delete_state(sender)
@@ -0,0 +1,53 @@
+# Formato compacto de las entradas elector:cedula:* en Redis
+#
+# En lugar del JSON con los diccionarios completos de elector, centro y geografía,
+# se guarda un byte de versión seguido de una lista msgpack con los campos del
+# elector en orden fijo. El centro y la geografía no se guardan: al leer se
+# resuelven por código contra los datos de referencia en memoria.
+#
+# Versiones:
+#   1  [id, letra_cedula, numero_cedula, p_apellido, s_apellido, p_nombre, s_nombre,
+#       sexo, fecha_nacimiento (YYYY-MM-DD o None), codigo_estado, codigo_municipio,
+#       codigo_parroquia, codigo_centro_votacion]
+import json
+from datetime import date
+
+import msgpack
+
+ELECTOR_CODEC_VERSION = 1
+
+ELECTOR_FIELDS_V1 = (
+    'id', 'letra_cedula', 'numero_cedula', 'p_apellido', 's_apellido', 'p_nombre', 's_nombre',
+    'sexo', 'fecha_nacimiento', 'codigo_estado', 'codigo_municipio', 'codigo_parroquia',
+    'codigo_centro_votacion'
+)
+
+_HEADER_V1 = bytes([1])
+
+
+def encode_elector_detail(detail) -> bytes:
+    elector = detail['elector']
+    values = [elector[field] for field in ELECTOR_FIELDS_V1]
+    fecha = values[8]
+    if isinstance(fecha, date):
+        values[8] = fecha.isoformat()
+    return _HEADER_V1 + msgpack.packb(values, use_bin_type=True)
+
+
+def decode_elector_detail(data: bytes, reference):
+    version = data[0]
+    if version == 1:
+        elector = dict(zip(ELECTOR_FIELDS_V1, msgpack.unpackb(data[1:], raw=False)))
+    elif data[:1] == b'{':
+        # Entradas JSON escritas antes de este formato; caducan solas por TTL
+        return json.loads(data)
+    else:
+        raise ValueError(f"Unknown elector cache format version {version}")
+
+    return {
+        'elector': elector,
+        'centro_votacion': reference.centro(elector['codigo_centro_votacion']),
+        'geografico': reference.geografico(
+            elector['codigo_estado'], elector['codigo_municipio'], elector['codigo_parroquia']
+        ),
+    }
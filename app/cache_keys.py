@@ -0,0 +1,68 @@
+# Claves de Redis con generación para los datos derivados del padrón
+#
+# Las claves de electores y estadísticas llevan el número de generación vigente
+# (elector:g7:cedula:123, stats:g7:estado). Para invalidarlas todas basta con
+# incrementar CACHE_GENERATION_KEY: nadie vuelve a leer las de la generación
+# anterior y caducan solas por su TTL, sin FLUSHDB ni SCAN.
+import asyncio
+import logging
+
+CACHE_GENERATION_KEY = 'cache:generation'
+# Respaldo por si se pierde el aviso por pub/sub
+GENERATION_POLL_SECONDS = 30
+
+
+def elector_cedula_key(generation: int, numero_cedula) -> str:
+    return f"elector:g{generation}:cedula:{numero_cedula}"
+
+
+def elector_missing_key(generation: int, numero_cedula) -> str:
+    return f"elector:g{generation}:missing:{numero_cedula}"
+
+
+def elector_id_key(generation: int, elector_id) -> str:
+    return f"elector:g{generation}:{elector_id}"
+
+
+def stats_key(generation: int, stat_type: str) -> str:
+    return f"stats:g{generation}:{stat_type}"
+
+
+def read_generation_sync(client) -> int:
+    value = client.get(CACHE_GENERATION_KEY)
+    return int(value) if value else 0
+
+
+class CacheGeneration:
+    """Generación vigente vista por este proceso, sin consultar Redis en cada petición."""
+
+    def __init__(self):
+        self.value = 0
+
+    async def refresh(self, redis):
+        value = await redis.get(CACHE_GENERATION_KEY)
+        self.value = int(value) if value else 0
+        return self.value
+
+    async def bump(self, redis):
+        self.value = await redis.incr(CACHE_GENERATION_KEY)
+        return self.value
+
+    async def watch(self, redis, interval=GENERATION_POLL_SECONDS, on_refresh=None):
+        # on_refresh (una corrutina) se llama tras cada sondeo, aunque Redis no responda,
+        # para que lo que depende de la generación se ponga al día sin el aviso por pub/sub
+        while True:
+            try:
+                await self.refresh(redis)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"Could not refresh cache generation: {e}")
+            if on_refresh is not None:
+                try:
+                    await on_refresh()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logging.warning(f"Error after refreshing cache generation: {e}")
+            await asyncio.sleep(interval)
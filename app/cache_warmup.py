@@ -0,0 +1,135 @@
+# Precarga de las entradas de detalle por cédula antes de una campaña
+#
+# Uso:
+#   python -m app.cache_warmup --estado 1 [--municipio 2]
+#   python -m app.cache_warmup --file cedulas.txt --rate 2000
+#
+# Escribe exactamente lo mismo que get_elector_by_cedula_from_cache en app/main.py
+# (formato de app/cache_codec.py, con TTL de una hora). Las escrituras van
+# en lotes por pipeline (MSET + EXPIRE) y se limitan a --rate filas por segundo para
+# no quitarle Redis ni PostgreSQL al tráfico real. Las claves son las de la
+# generación vigente al arrancar (app/cache_keys.py).
+import os
+import time
+import argparse
+import logging
+
+import redis as redis_sync
+from sqlalchemy import Integer, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from app.database import engine
+from app.models import Elector
+from app.cache_codec import encode_elector_detail
+from app.cache_keys import elector_cedula_key, elector_missing_key, read_generation_sync
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6380/0")
+# Mismo TTL que usa la API al guardar el detalle de un elector
+ELECTOR_CACHE_TTL = 60 * 60
+BATCH_SIZE = 1000
+DEFAULT_RATE = 5000
+PROGRESS_INTERVAL = 5
+
+_elector = Elector.__table__
+
+
+def read_cedulas_file(path: str):
+    cedulas = set()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line.isdigit():
+                cedulas.add(int(line))
+    return sorted(cedulas)
+
+
+def build_query(codigo_estado=None, codigo_municipio=None, cedulas=None):
+    query = select(*_elector.columns)
+    if cedulas is not None:
+        query = query.where(_elector.c.numero_cedula == any_(bindparam('cedulas', type_=ARRAY(Integer))))
+    if codigo_estado is not None:
+        query = query.where(_elector.c.codigo_estado == codigo_estado)
+    if codigo_municipio is not None:
+        query = query.where(_elector.c.codigo_municipio == codigo_municipio)
+    return query
+
+
+def write_batch(client, batch, ttl: int, generation: int):
+    # Un solo viaje por lote: MSET con todas las claves, su TTL y el borrado de
+    # las entradas negativas que pudieran quedar de esas cédulas
+    entries = {elector_cedula_key(generation, numero): value for numero, value in batch.items()}
+    pipe = client.pipeline(transaction=False)
+    pipe.mset(entries)
+    for key in entries:
+        pipe.expire(key, ttl)
+    pipe.delete(*[elector_missing_key(generation, numero) for numero in batch])
+    pipe.execute()
+
+
+def warm_up(codigo_estado=None, codigo_municipio=None, cedulas=None, rate: float = DEFAULT_RATE,
+            batch_size: int = BATCH_SIZE, ttl: int = ELECTOR_CACHE_TTL, redis_url: str = REDIS_URL):
+    client = redis_sync.Redis.from_url(redis_url)
+    query = build_query(codigo_estado, codigo_municipio, cedulas)
+    params = {'cedulas': cedulas} if cedulas is not None else {}
+    generation = read_generation_sync(client)
+
+    written = 0
+    start = time.perf_counter()
+    last_report = start
+    try:
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query, params)
+            for partition in result.partitions():
+                batch = {}
+                for row in partition:
+                    # El centro y la geografía se resuelven al leer: basta con la fila del elector
+                    elector = dict(row._mapping)
+                    batch[elector['numero_cedula']] = encode_elector_detail({'elector': elector})
+                write_batch(client, batch, ttl, generation)
+                written += len(batch)
+
+                # Control de ritmo: no adelantarse a written / rate segundos
+                elapsed = time.perf_counter() - start
+                if rate:
+                    ahead = written / rate - elapsed
+                    if ahead > 0:
+                        time.sleep(ahead)
+
+                now = time.perf_counter()
+                if now - last_report >= PROGRESS_INTERVAL:
+                    logging.info(f"Warmed {written} cédulas ({written / (now - start):,.0f}/s)")
+                    last_report = now
+    finally:
+        client.close()
+
+    elapsed = time.perf_counter() - start
+    requested = f" of {len(cedulas)} requested" if cedulas is not None else ""
+    logging.info(
+        f"Warm-up done: {written} cédulas{requested} in {elapsed:.1f}s "
+        f"({written / elapsed if elapsed > 0 else 0:,.0f}/s)"
+    )
+    return written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Precarga en Redis el detalle de electores por cédula")
+    parser.add_argument('--estado', type=int, default=None, help="Código de estado")
+    parser.add_argument('--municipio', type=int, default=None, help="Código de municipio (requiere --estado)")
+    parser.add_argument('--file', default=None, help="Archivo con una cédula por línea")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help="Máximo de cédulas por segundo, 0 sin límite (por defecto: %(default)s)")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help="Cédulas por pipeline (por defecto: %(default)s)")
+    parser.add_argument('--ttl', type=int, default=ELECTOR_CACHE_TTL,
+                        help="TTL de las entradas en segundos (por defecto: %(default)s)")
+    args = parser.parse_args()
+
+    if args.municipio is not None and args.estado is None:
+        parser.error("--municipio requiere --estado")
+    if args.estado is None and args.file is None:
+        parser.error("Indica --estado/--municipio o --file")
+
+    cedulas = read_cedulas_file(args.file) if args.file else None
+    warm_up(args.estado, args.municipio, cedulas, args.rate, args.batch_size, args.ttl)
@@ -1,113 +1,558 @@
 import os
+import io
 import csv
+import time
+import re
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
+from sqlalchemy import text
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
-from app.models import Elector, Geografico, CentroVotacion
-import chardet
+from app.database import engine, SessionLocal
+from app.models import Elector, Geografico, CentroVotacion, LoadJournal
+from app.file_encoding import detect_encoding
+from app.local_cache import publish_invalidation
+from app.reference_data import bump_reference_version_sync
+from app.parse_electores import ELECTOR_COLUMNS, RejectWriter, parse_elector_chunk
 import logging
 from tqdm import tqdm
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def detect_encoding(file_path):
-    with open(file_path, 'rb') as f:
-        result = chardet.detect(f.read())
-        return result['encoding']
+COPY_ELECTORES_SQL = (
+    f"COPY electores ({', '.join(ELECTOR_COLUMNS)}) FROM STDIN "
+    "WITH (FORMAT csv, FORCE_NULL (fecha_nacimiento))"
+)
 
-def load_electors(filepath: str, db: Session):
-    encoding = detect_encoding(filepath)
-    logging.info(f"Loading electors from {filepath} with encoding {encoding}")
+
+def convert_elector_row(row):
+    # Los enteros se normalizan en Python; la fecha (YYYY-MM-DD) la interpreta PostgreSQL
+    # y una fecha vacía llega como NULL gracias a FORCE_NULL
+    return (
+        row[0],
+        int(row[1]),
+        row[2],
+        row[3],
+        row[4],
+        row[5],
+        row[6],
+        row[7],
+        int(row[8]),
+        int(row[9]),
+        int(row[10]),
+        int(row[11])
+    )
+
+
+class CopyStream:
+    """Objeto tipo archivo que alimenta ``copy_expert`` con filas ya convertidas."""
+
+    def __init__(self, rows, convert, rows_per_chunk=10000):
+        self._rows = iter(rows)
+        self._convert = convert
+        self._rows_per_chunk = rows_per_chunk
+        self._buffer = ''
+        self._exhausted = False
+        self.rows = 0
+
+    def _fill(self):
+        output = io.StringIO()
+        # QUOTE_NONNUMERIC deja los enteros sin comillas y las cadenas vacías como "",
+        # que COPY conserva como '' igual que la carga por ORM
+        writer = csv.writer(output, quoting=csv.QUOTE_NONNUMERIC, lineterminator='\n')
+        written = 0
+        for row in self._rows:
+            writer.writerow(self._convert(row))
+            written += 1
+            if written >= self._rows_per_chunk:
+                break
+        if written == 0:
+            self._exhausted = True
+        self.rows += written
+        return output.getvalue()
+
+    def read(self, size=-1):
+        while not self._exhausted and (size is None or size < 0 or len(self._buffer) < size):
+            self._buffer += self._fill()
+        if size is None or size < 0:
+            data, self._buffer = self._buffer, ''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
+# Filas por transacción: cada lote se confirma junto con su checkpoint
+BATCH_SIZE = 100000
+REJECTS_SUFFIX = '.rejects.txt'
+
+
+def get_checkpoint(filepath: str, db: Session) -> LoadJournal:
+    stat = os.stat(filepath)
+    archivo = os.path.abspath(filepath)
+    journal = db.query(LoadJournal).filter(LoadJournal.archivo == archivo).first()
+    if journal is None:
+        journal = LoadJournal(archivo=archivo, tamano=stat.st_size, mtime_ns=stat.st_mtime_ns,
+                              byte_offset=0, filas=0, completado=False)
+        db.add(journal)
+        db.commit()
+    elif journal.tamano != stat.st_size or journal.mtime_ns != stat.st_mtime_ns:
+        logging.warning(f"{filepath} changed since its last checkpoint; loading it from the beginning")
+        journal.tamano = stat.st_size
+        journal.mtime_ns = stat.st_mtime_ns
+        journal.byte_offset = 0
+        journal.filas = 0
+        journal.completado = False
+        db.commit()
+    return journal
+
+
+def iter_line_batches(filepath: str, encoding: str, start_offset: int, batch_size: int):
+    # Se lee en binario para conocer el byte exacto donde termina cada lote
+    with open(filepath, 'rb') as file:
+        if start_offset:
+            file.seek(start_offset)
+        else:
+            file.readline()  # Skip the header
+        offset = file.tell()
+
+        lines = []
+        for line in file:
+            offset += len(line)
+            lines.append(line.decode(encoding))
+            if len(lines) >= batch_size:
+                yield lines, offset
+                lines = []
+        if lines:
+            yield lines, offset
+
+
+def insert_electors_orm(lines, db: Session):
+    rows = list(csv.reader(lines))
+    db.add_all([
+        Elector(
+            letra_cedula=row[0],
+            numero_cedula=int(row[1]),
+            p_apellido=row[2],
+            s_apellido=row[3],
+            p_nombre=row[4],
+            s_nombre=row[5],
+            sexo=row[6],
+            fecha_nacimiento=datetime.strptime(row[7], '%Y-%m-%d'),
+            codigo_estado=int(row[8]),
+            codigo_municipio=int(row[9]),
+            codigo_parroquia=int(row[10]),
+            codigo_centro_votacion=int(row[11])
+        )
+        for row in rows
+    ])
+    return len(rows)
+
+
+def insert_electors_copy(lines, db: Session):
+    stream = CopyStream(csv.reader(lines), convert_elector_row)
+    cursor = db.connection().connection.cursor()
     try:
-        with open(filepath, 'r', encoding=encoding) as file:
-            reader = csv.reader(file)
-            next(reader)  # Skip the header
+        cursor.copy_expert(COPY_ELECTORES_SQL, stream)
+    finally:
+        cursor.close()
+    return stream.rows
 
-            for row in tqdm(reader, desc=f"Loading Electors from {os.path.basename(filepath)}", unit=" lines"):
-                elector = Elector(
-                    letra_cedula=row[0],
-                    numero_cedula=int(row[1]),
-                    p_apellido=row[2],
-                    s_apellido=row[3],
-                    p_nombre=row[4],
-                    s_nombre=row[5],
-                    sexo=row[6],
-                    fecha_nacimiento=datetime.strptime(row[7], '%Y-%m-%d'),
-                    codigo_estado=int(row[8]),
-                    codigo_municipio=int(row[9]),
-                    codigo_parroquia=int(row[10]),
-                    codigo_centro_votacion=int(row[11])
-                )
-                db.add(elector)
-            db.commit()
+
+def insert_electors_vectorized(lines, db: Session, rejects: RejectWriter):
+    valid, rejected = parse_elector_chunk(lines)
+    rejects.stage(rejected)
+
+    buffer = io.StringIO()
+    valid.to_csv(buffer, columns=list(ELECTOR_COLUMNS), index=False, header=False,
+                 quoting=csv.QUOTE_NONNUMERIC, lineterminator='\n')
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(COPY_ELECTORES_SQL, buffer)
+    finally:
+        cursor.close()
+    return len(valid)
+
+
+def load_electors_batched(filepath: str, db: Session, insert_batch, encoding: str = None,
+                          batch_size: int = BATCH_SIZE, rejects: RejectWriter = None):
+    encoding = detect_encoding(filepath, override=encoding)
+    journal = get_checkpoint(filepath, db)
+    if journal.completado:
+        logging.info(f"{filepath} already loaded ({journal.filas} rows), skipping")
+        return 0
+    if journal.byte_offset:
+        logging.info(f"Resuming {filepath} at byte {journal.byte_offset} ({journal.filas} rows already committed)")
+    elif rejects is not None:
+        # Carga desde el principio: los rechazos de un intento anterior ya no valen
+        rejects.truncate()
+    logging.info(f"Loading electors from {filepath} with encoding {encoding}")
+
+    loaded = 0
+    start = time.perf_counter()
+    try:
+        with tqdm(desc=f"Loading Electors from {os.path.basename(filepath)}", unit=" lines",
+                  initial=journal.filas) as progress:
+            for lines, offset in iter_line_batches(filepath, encoding, journal.byte_offset, batch_size):
+                inserted = insert_batch(lines, db)
+                # El checkpoint viaja en la misma transacción que el lote
+                journal.byte_offset = offset
+                journal.filas += inserted
+                db.commit()
+                # Los rechazos de un lote se escriben cuando el lote ya está confirmado,
+                # así al reanudar no se repiten los del lote que se vuelve a leer
+                if rejects is not None:
+                    rejects.flush()
+                loaded += inserted
+                progress.update(len(lines))
+        journal.completado = True
+        db.commit()
     except Exception as e:
         logging.error(f"Error loading electors: {e}")
         db.rollback()
+        if rejects is not None:
+            rejects.discard()
+        raise
+
+    elapsed = time.perf_counter() - start
+    rate = loaded / elapsed if elapsed > 0 else 0
+    logging.info(f"Loaded {loaded} electors from {os.path.basename(filepath)} in {elapsed:.1f}s ({rate:,.0f} rows/s)")
+    return loaded
+
+
+def load_electors(filepath: str, db: Session, encoding: str = None, batch_size: int = BATCH_SIZE):
+    return load_electors_batched(filepath, db, insert_electors_orm, encoding, batch_size)
+
+
+def load_electors_copy(filepath: str, db: Session, encoding: str = None, batch_size: int = BATCH_SIZE):
+    return load_electors_batched(filepath, db, insert_electors_copy, encoding, batch_size)
+
 
-def load_geographic_data(filepath: str, db: Session):
-    encoding = detect_encoding(filepath)
-    logging.info(f"Loading geographic data from {filepath} with encoding {encoding}")
+def load_electors_vectorized(filepath: str, db: Session, encoding: str = None, batch_size: int = BATCH_SIZE):
+    # Las filas inválidas no detienen la carga: quedan en <archivo>.rejects.txt con su motivo.
+    # No terminan en .csv para que nunca se tomen por una parte del padrón
+    rejects = RejectWriter(f"{filepath}{REJECTS_SUFFIX}")
+
+    def insert_batch(lines, db):
+        return insert_electors_vectorized(lines, db, rejects)
+
+    loaded = load_electors_batched(filepath, db, insert_batch, encoding, batch_size, rejects)
+    if rejects.count:
+        logging.warning(f"{rejects.count} rows from {os.path.basename(filepath)} rejected, see {rejects.path}")
+    return loaded
+
+
+def load_reference_table(filepath: str, db: Session, model, build_row, desc: str, encoding: str = None):
+    # Las tablas de referencia se reemplazan enteras y quedan registradas en load_journal:
+    # volver a ejecutar la carga (p. ej. para reanudar electores) no duplica sus filas
+    journal = get_checkpoint(filepath, db)
+    if journal.completado:
+        logging.info(f"{filepath} already loaded ({journal.filas} rows), skipping")
+        return 0
+    encoding = detect_encoding(filepath, override=encoding)
+    logging.info(f"Loading {model.__tablename__} from {filepath} with encoding {encoding}")
     try:
         with open(filepath, 'r', encoding=encoding) as file:
             reader = csv.reader(file)
             next(reader)  # Skip the header
 
-            for row in tqdm(reader, desc="Loading Geographic Data", unit=" lines"):
-                geographic = Geografico(
-                    codigo_estado=int(row[0]),
-                    codigo_municipio=int(row[1]),
-                    codigo_parroquia=int(row[2]),
-                    estado=row[3],
-                    municipio=row[4],
-                    parroquia=row[5]
-                )
-                db.add(geographic)
+            db.query(model).delete(synchronize_session=False)
+            rows = 0
+            for row in tqdm(reader, desc=desc, unit=" lines"):
+                db.add(build_row(row))
+                rows += 1
+            journal.filas = rows
+            journal.completado = True
             db.commit()
+        return rows
     except Exception as e:
-        logging.error(f"Error loading geographic data: {e}")
+        logging.error(f"Error loading {model.__tablename__}: {e}")
         db.rollback()
+        return 0
+
+
+def build_geographic(row):
+    return Geografico(
+        codigo_estado=int(row[0]),
+        codigo_municipio=int(row[1]),
+        codigo_parroquia=int(row[2]),
+        estado=row[3],
+        municipio=row[4],
+        parroquia=row[5]
+    )
+
+
+def build_voting_center(row):
+    return CentroVotacion(
+        codificacion_vieja_cv=int(row[0]),
+        codificacion_nueva_cv=int(row[1]),
+        condicion=int(row[2]),
+        codigo_estado=int(row[3]),
+        codigo_municipio=int(row[4]),
+        codigo_parroquia=int(row[5]),
+        nombre_cv=row[6],
+        direccion_cv=row[7]
+    )
+
+
+def load_geographic_data(filepath: str, db: Session, encoding: str = None):
+    return load_reference_table(filepath, db, Geografico, build_geographic, "Loading Geographic Data", encoding)
+
+
+def load_voting_centers(filepath: str, db: Session, encoding: str = None):
+    return load_reference_table(filepath, db, CentroVotacion, build_voting_center, "Loading Voting Centers", encoding)
+
 
-def load_voting_centers(filepath: str, db: Session):
-    encoding = detect_encoding(filepath)
-    logging.info(f"Loading voting centers from {filepath} with encoding {encoding}")
+# Manifiesto que escribe split_csv.py junto a las partes
+SPLIT_MANIFEST_FILENAME = 'manifest.json'
+SPLIT_PART_PATTERN = re.compile(r'part_(\d+)\.csv')
+
+ELECTOR_LOADERS = {
+    'orm': load_electors,
+    'copy': load_electors_copy,
+    'vectorized': load_electors_vectorized,
+}
+
+
+def list_split_files(input_dir: str):
+    # Si split_csv.py dejó un manifiesto, se respeta su lista y orden de partes
+    manifest_path = os.path.join(input_dir, SPLIT_MANIFEST_FILENAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        parts = [os.path.join(input_dir, part['name']) for part in manifest['parts']]
+        missing = [path for path in parts if not os.path.exists(path)]
+        if missing:
+            raise FileNotFoundError(f"Parts listed in {manifest_path} not found: {', '.join(missing)}")
+        logging.info(f"Using {manifest_path}: {len(parts)} parts, {manifest['total_rows']} rows")
+        return parts
+
+    # Solo los part_N.csv de split_csv.py, con part_2.csv antes que part_10.csv
+    parts = []
+    for filename in os.listdir(input_dir):
+        match = SPLIT_PART_PATTERN.fullmatch(filename)
+        if match:
+            parts.append((int(match.group(1)), filename))
+    return [os.path.join(input_dir, filename) for _, filename in sorted(parts)]
+
+
+def _init_worker():
+    # Las conexiones heredadas del proceso padre no se pueden compartir entre procesos;
+    # cada worker abre las suyas propias
+    engine.dispose(close=False)
+
+
+def load_part(filepath: str, mode: str, encoding: str = None, batch_size: int = BATCH_SIZE):
+    db = SessionLocal()
+    start = time.perf_counter()
     try:
-        with open(filepath, 'r', encoding=encoding) as file:
-            reader = csv.reader(file)
-            next(reader)  # Skip the header
+        rows = ELECTOR_LOADERS[mode](filepath, db, encoding=encoding, batch_size=batch_size)
+        return {'part': os.path.basename(filepath), 'status': 'ok', 'rows': rows,
+                'seconds': time.perf_counter() - start, 'error': None}
+    except Exception as e:
+        return {'part': os.path.basename(filepath), 'status': 'error', 'rows': 0,
+                'seconds': time.perf_counter() - start, 'error': str(e)}
+    finally:
+        db.close()
 
-            for row in tqdm(reader, desc="Loading Voting Centers", unit=" lines"):
-                center = CentroVotacion(
-                    codificacion_vieja_cv=int(row[0]),
-                    codificacion_nueva_cv=int(row[1]),
-                    condicion=int(row[2]),
-                    codigo_estado=int(row[3]),
-                    codigo_municipio=int(row[4]),
-                    codigo_parroquia=int(row[5]),
-                    nombre_cv=row[6],
-                    direccion_cv=row[7]
-                )
-                db.add(center)
-            db.commit()
+
+def _run_parts(parts, workers: int, mode: str, encoding: str = None, batch_size: int = BATCH_SIZE):
+    if workers == 1:
+        for filepath in parts:
+            yield load_part(filepath, mode, encoding, batch_size)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        futures = [executor.submit(load_part, filepath, mode, encoding, batch_size) for filepath in parts]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def load_split_files_parallel(input_dir: str, workers: int = None, mode: str = 'copy', encoding: str = None,
+                              batch_size: int = BATCH_SIZE):
+    parts = list_split_files(input_dir)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(parts) or 1))
+    logging.info(f"Loading {len(parts)} parts from {input_dir} with {workers} workers ({mode})")
+
+    start = time.perf_counter()
+    results = []
+    for result in _run_parts(parts, workers, mode, encoding, batch_size):
+        if result['status'] == 'ok':
+            logging.info(f"{result['part']}: {result['rows']} rows in {result['seconds']:.1f}s")
+        else:
+            logging.error(f"{result['part']}: failed after {result['seconds']:.1f}s: {result['error']}")
+        results.append(result)
+
+    log_load_summary(results, time.perf_counter() - start)
+    return results
+
+
+def log_load_summary(results, elapsed: float):
+    ok = [r for r in results if r['status'] == 'ok']
+    failed = [r for r in results if r['status'] != 'ok']
+    total_rows = sum(r['rows'] for r in ok)
+    rate = total_rows / elapsed if elapsed > 0 else 0
+    logging.info(
+        f"Summary: {len(ok)}/{len(results)} parts loaded, {total_rows} rows "
+        f"in {elapsed:.1f}s ({rate:,.0f} rows/s)"
+    )
+    for result in failed:
+        logging.error(f"Failed part {result['part']}: {result['error']}")
+
+
+# Definiciones de los índices retirados durante una carga masiva; si la carga se
+# interrumpe, la siguiente ejecución los reconstruye a partir de este archivo
+DROPPED_INDEXES_FILENAME = '.electores_indexes.json'
+
+# Índices de electores que no respaldan una restricción (la clave primaria se conserva)
+SECONDARY_INDEXES_SQL = """
+    SELECT i.relname AS name, pg_get_indexdef(i.oid) AS definition
+    FROM pg_index x
+    JOIN pg_class i ON i.oid = x.indexrelid
+    WHERE x.indrelid = 'electores'::regclass
+      AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+    ORDER BY i.relname
+"""
+
+
+def drop_secondary_indexes(state_path: str):
+    if os.path.exists(state_path):
+        # Una carga anterior no llegó a reconstruirlos: se reutilizan sus definiciones
+        with open(state_path, 'r', encoding='utf-8') as f:
+            indexes = json.load(f)
+        logging.warning(f"Found {state_path} from an interrupted bulk load")
+    else:
+        with engine.connect() as conn:
+            indexes = [dict(row._mapping) for row in conn.execute(text(SECONDARY_INDEXES_SQL))]
+        # Se guardan antes de tocar nada para no perder nunca una definición
+        with open(state_path, 'w', encoding='utf-8') as f:
+            json.dump(indexes, f, indent=2)
+
+    with engine.begin() as conn:
+        for index in indexes:
+            logging.info(f"Dropping index {index['name']}")
+            conn.execute(text(f'DROP INDEX IF EXISTS "{index["name"]}"'))
+    return indexes
+
+
+def rebuild_indexes(indexes, state_path: str, concurrently: bool = True):
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for index in indexes:
+            valid = conn.execute(
+                text("SELECT x.indisvalid FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid "
+                     "WHERE i.relname = :name"),
+                {'name': index['name']}
+            ).scalar()
+            if valid:
+                continue
+            if valid is not None:
+                # Restos de un CREATE INDEX CONCURRENTLY fallido
+                conn.execute(text(f'DROP INDEX "{index["name"]}"'))
+
+            definition = index['definition']
+            if concurrently:
+                definition = re.sub(r'^CREATE (UNIQUE )?INDEX ', r'CREATE \1INDEX CONCURRENTLY ', definition)
+            logging.info(f"Rebuilding index {index['name']}")
+            conn.execute(text(definition))
+    os.remove(state_path)
+
+
+def rebuild_indexes_after_failure(indexes, state_path: str, concurrently: bool = True):
+    # La carga ya falló: se intenta dejar la tabla con sus índices, pero si tampoco se
+    # puede, el error que debe verse es el de la carga. Las definiciones siguen en state_path
+    try:
+        rebuild_indexes(indexes, state_path, concurrently)
     except Exception as e:
-        logging.error(f"Error loading voting centers: {e}")
-        db.rollback()
+        logging.error(f"Could not rebuild indexes after the failed load ({e}); definitions kept in {state_path}")
+
+
+def analyze_electores():
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        conn.execute(text("ANALYZE electores"))
+
+
+def bulk_load_split_files(input_dir: str, workers: int = None, mode: str = 'copy', encoding: str = None,
+                          batch_size: int = BATCH_SIZE, concurrently: bool = True):
+    # Carga sin índices secundarios: se retiran, se carga y se reconstruyen al final
+    state_path = os.path.join(input_dir, DROPPED_INDEXES_FILENAME)
+    timings = {}
+
+    start = time.perf_counter()
+    indexes = drop_secondary_indexes(state_path)
+    timings['drop indexes'] = time.perf_counter() - start
+
+    try:
+        start = time.perf_counter()
+        results = load_split_files_parallel(input_dir, workers, mode, encoding, batch_size)
+        timings['load'] = time.perf_counter() - start
+    except BaseException:
+        # Aunque la carga falle, la tabla debe quedar con el esquema de las migraciones
+        rebuild_indexes_after_failure(indexes, state_path, concurrently)
+        raise
+
+    start = time.perf_counter()
+    rebuild_indexes(indexes, state_path, concurrently)
+    timings['rebuild indexes'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    analyze_electores()
+    timings['analyze'] = time.perf_counter() - start
+
+    for phase, seconds in timings.items():
+        logging.info(f"Phase {phase}: {seconds:.1f}s")
+    logging.info(f"Bulk load total: {sum(timings.values()):.1f}s")
+    return results
+
 
 # Inicializar la sesión de la base de datos y cargar datos
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Carga el registro electoral en la base de datos")
+    parser.add_argument('--mode', choices=sorted(ELECTOR_LOADERS), default='copy',
+                        help="Método de carga de electores (por defecto: copy)")
+    parser.add_argument('--input-dir', default='data/split_files',
+                        help="Directorio con los archivos part_N.csv")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="Procesos de carga en paralelo (por defecto: núcleos disponibles)")
+    parser.add_argument('--encoding', default=None,
+                        help="Codificación de los archivos de entrada (por defecto: se detecta)")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help="Filas por transacción y checkpoint (por defecto: %(default)s)")
+    parser.add_argument('--bulk', action='store_true',
+                        help="Retira los índices secundarios de electores durante la carga y los reconstruye al final")
+    parser.add_argument('--no-concurrent-index', action='store_true',
+                        help="Con --bulk, reconstruye los índices sin CONCURRENTLY (más rápido, bloquea escrituras)")
+    args = parser.parse_args()
+
+    # Cargar los archivos divididos de electores
+    if args.bulk:
+        results = bulk_load_split_files(args.input_dir, args.workers, args.mode, args.encoding,
+                                        args.batch_size, concurrently=not args.no_concurrent_index)
+    else:
+        results = load_split_files_parallel(args.input_dir, args.workers, args.mode, args.encoding, args.batch_size)
+
+    failed = [r for r in results if r['status'] != 'ok']
     db = SessionLocal()
     try:
-        # Cargar los archivos divididos de electores
-        input_dir = 'data/split_files'
-        for filename in os.listdir(input_dir):
-            filepath = os.path.join(input_dir, filename)
-            if filename.endswith('.csv'):
-                load_electors(filepath, db)
-        
-        # Cargar los datos geográficos
-        load_geographic_data('data/geo20240416_pp.txt', db)
-        
-        # Cargar los centros de votación
-        load_voting_centers('data/cva20240416.txt', db)
+        if failed:
+            # Se cargan en la ejecución que complete todas las partes
+            logging.error(f"{len(failed)} parts failed; skipping geographic data and voting centers")
+        else:
+            # Cargar los datos geográficos
+            load_geographic_data('data/geo20240416_pp.txt', db)
+
+            # Cargar los centros de votación
+            load_voting_centers('data/cva20240416.txt', db)
     finally:
         db.close()
+        # Los workers de la API descartan lo que tengan en memoria del padrón anterior
+        bump_reference_version_sync()
+        publish_invalidation()
+
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,141 @@
+# Filtro de Bloom con todas las cédulas del padrón
+#
+# Cada worker lo construye al arrancar a partir de electores.numero_cedula. Si el
+# filtro dice que una cédula no está, es seguro que no está: la petición se
+# responde sin consultar Redis ni PostgreSQL. Si dice que puede estar, se sigue
+# el camino normal (con una tasa de falsos positivos de FP_RATE).
+#
+# El filtro queda ligado a la generación de caché (app/cache_keys.py) con la que
+# se construyó. Si la generación cambia y el aviso por pub/sub se perdió, el filtro
+# deja de descartar cédulas hasta que se reconstruye: uno viejo no conoce las nuevas.
+import os
+import math
+import time
+import asyncio
+import logging
+
+import numpy as np
+from sqlalchemy import text
+
+CEDULA_FILTER_FP_RATE = float(os.getenv("CEDULA_FILTER_FP_RATE", "0.01"))
+# Cédulas leídas de la base de datos por bloque al construir el filtro
+BUILD_CHUNK_SIZE = 1_000_000
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix64(x):
+    # splitmix64: reparte bien claves consecutivas como las cédulas
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+def _mix64_array(x):
+    # La misma función sobre arrays uint64 (la multiplicación desborda módulo 2**64)
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+class BloomFilter:
+    def __init__(self, capacity, fp_rate=CEDULA_FILTER_FP_RATE):
+        capacity = max(1, capacity)
+        self.num_bits = max(64, int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    def add_many(self, values):
+        values = np.asarray(values, dtype=np.int64).astype(np.uint64)
+        h1 = _mix64_array(values)
+        h2 = _mix64_array(h1) | np.uint64(1)
+        num_bits = np.uint64(self.num_bits)
+        for i in range(self.num_hashes):
+            positions = (h1 + np.uint64(i) * h2) % num_bits
+            np.bitwise_or.at(self.bits, positions >> np.uint64(3),
+                             np.left_shift(1, positions & np.uint64(7)).astype(np.uint8))
+        self.count += len(values)
+
+    def __contains__(self, value):
+        h1 = _mix64(int(value) & _MASK64)
+        h2 = _mix64(h1) | 1
+        bits = self.bits
+        for i in range(self.num_hashes):
+            position = ((h1 + i * h2) & _MASK64) % self.num_bits
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def stats(self):
+        return {
+            'count': self.count,
+            'bits': self.num_bits,
+            'hashes': self.num_hashes,
+            'memory_bytes': int(self.bits.nbytes),
+        }
+
+
+def build_cedula_filter(engine, fp_rate=CEDULA_FILTER_FP_RATE):
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        # reltuples basta para dimensionar; se deja margen por si está desactualizado
+        estimate = conn.execute(text(
+            "SELECT reltuples::bigint FROM pg_class WHERE relname = 'electores'"
+        )).scalar() or 0
+        bloom = BloomFilter(int(max(estimate, 1000) * 1.2), fp_rate)
+
+        result = conn.execution_options(stream_results=True, yield_per=BUILD_CHUNK_SIZE).execute(
+            text("SELECT numero_cedula FROM electores WHERE numero_cedula IS NOT NULL")
+        )
+        for partition in result.partitions():
+            bloom.add_many([row[0] for row in partition])
+
+    logging.info(
+        f"Cédula filter built with {bloom.count} cédulas in {time.perf_counter() - start:.1f}s "
+        f"({bloom.bits.nbytes / 1024 / 1024:.1f} MiB)"
+    )
+    return bloom
+
+
+class CedulaFilterState:
+    """Filtro del worker y la generación de caché con la que se construyó."""
+
+    def __init__(self):
+        self.bloom = None
+        self.generation = None
+        self.building = False
+        self.builds = 0
+
+    def is_current(self, generation: int) -> bool:
+        return self.bloom is not None and self.generation == generation
+
+    def definitely_missing(self, numero_cedula: int, generation: int) -> bool:
+        # Un filtro de otra generación, o a medio construir, no descarta nada
+        return self.is_current(generation) and numero_cedula not in self.bloom
+
+    async def rebuild(self, build, generation: int) -> bool:
+        # build: función síncrona que devuelve el BloomFilter; corre en un hilo
+        if self.building:
+            return False
+        self.building = True
+        self.bloom = None
+        try:
+            bloom = await asyncio.to_thread(build)
+            self.bloom, self.generation = bloom, generation
+            self.builds += 1
+        except Exception as e:
+            logging.error(f"Error construyendo el filtro de cédulas: {e}")
+        finally:
+            self.building = False
+        return self.bloom is not None
+
+    def stats(self):
+        return {
+            'generation': self.generation,
+            'building': self.building,
+            'builds': self.builds,
+            **(self.bloom.stats() if self.bloom is not None else {}),
+        }
@@ -0,0 +1,129 @@
+# Fábrica de motores SQLAlchemy con el pool configurado por entorno
+#
+# Todos los procesos (API, bot, cargadores) crean sus motores aquí, con el mismo
+# pool y los mismos ajustes:
+#   DB_POOL_SIZE       conexiones que se mantienen abiertas por motor (5)
+#   DB_MAX_OVERFLOW    conexiones extra bajo carga, se cierran al devolverse (10)
+#   DB_POOL_TIMEOUT    segundos de espera por una conexión antes de fallar (30)
+#   DB_POOL_PRE_PING   comprobar la conexión antes de usarla (true)
+#   DB_POOL_RECYCLE    segundos tras los que se reabre una conexión (1800)
+#
+# Cada worker de uvicorn abre como máximo (DB_POOL_SIZE + DB_MAX_OVERFLOW) conexiones
+# por motor, y hay uno síncrono y otro asíncrono: esa cifra por el número de
+# workers tiene que quedar por debajo de max_connections de PostgreSQL.
+import os
+import time
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+
+class PoolWaitStats:
+    """Tiempo que tardan las peticiones en obtener una conexión del pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self):
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(self.total_wait / attempts * 1000, 3) if attempts else 0.0,
+                'max_wait_ms': round(self.max_wait * 1000, 3),
+            }
+
+
+class _TimedPoolMixin:
+    # _do_get es donde el pool espera por una conexión libre o abre una nueva
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def recreate(self):
+        # dispose() sustituye el pool: las métricas siguen acumulándose en el nuevo
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return connection
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_options(**overrides):
+    options = {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+        'pool_recycle': DB_POOL_RECYCLE,
+    }
+    options.update(overrides)
+    return options
+
+
+def create_db_engine(url, **overrides):
+    return create_engine(url, poolclass=TimedQueuePool, **_pool_options(**overrides))
+
+
+def create_async_db_engine(url, **overrides):
+    return create_async_engine(url, poolclass=TimedAsyncAdaptedQueuePool, **_pool_options(**overrides))
+
+
+def pool_stats(engine):
+    # Acepta también un AsyncEngine
+    pool = getattr(engine, 'sync_engine', engine).pool
+    stats = {
+        'pool_size': pool.size(),
+        'max_overflow': pool._max_overflow,
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        # Negativo mientras no se han abierto pool_size conexiones
+        'overflow': pool.overflow(),
+        'timeout': pool.timeout(),
+        'recycle': pool._recycle,
+        'pre_ping': pool._pre_ping,
+    }
+    wait_stats = getattr(pool, 'wait_stats', None)
+    if wait_stats is not None:
+        stats.update(wait_stats.snapshot())
+    return stats
@@ -0,0 +1,282 @@
+# Importación incremental de un nuevo padrón contra la tabla electores
+#
+# Uso: python -m app.delta_import data/re20240416_pp.txt [--dry-run]
+#
+# En lugar de recargar todo el registro, se calcula un hash por cédula de la
+# nueva publicación y de la tabla actual, se comparan ambos conjuntos ordenados
+# y solo se aplican las altas, los cambios y las bajas.
+import io
+import os
+import csv
+import time
+import argparse
+import logging
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.cargadb import ELECTOR_COLUMNS
+from app.parse_electores import RejectWriter
+from app.file_encoding import detect_encoding
+from app.local_cache import publish_invalidation
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+CHUNK_SIZE = 500000
+
+# Los códigos pueden venir vacíos: se guardan como NULL, nunca con un valor centinela
+CODE_COLUMNS = ('codigo_estado', 'codigo_municipio', 'codigo_parroquia', 'codigo_centro_votacion')
+# Todo lo que puede cambiar de un padrón a otro para una misma cédula
+HASH_COLUMNS = [c for c in ELECTOR_COLUMNS if c != 'numero_cedula']
+UPDATE_COLUMNS = HASH_COLUMNS
+
+COPY_DELTA_SQL = (
+    f"COPY electores_delta ({', '.join(ELECTOR_COLUMNS)}) FROM STDIN "
+    f"WITH (FORMAT csv, FORCE_NULL (fecha_nacimiento, {', '.join(CODE_COLUMNS)}))"
+)
+
+
+def read_snapshot_chunks(filepath: str, encoding: str):
+    return pd.read_csv(
+        filepath, names=list(ELECTOR_COLUMNS), header=0, usecols=range(len(ELECTOR_COLUMNS)),
+        dtype=str, keep_default_na=False, chunksize=CHUNK_SIZE, encoding=encoding
+    )
+
+
+def read_table_chunks(db: Session, buffer):
+    # COPY TO produce el mismo texto que el archivo del CNE (fechas YYYY-MM-DD),
+    # así ambos lados se normalizan y se hashean exactamente igual
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY (SELECT {', '.join(ELECTOR_COLUMNS)} FROM electores) TO STDOUT WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+    buffer.seek(0)
+    return pd.read_csv(
+        buffer, names=list(ELECTOR_COLUMNS), header=None,
+        dtype=str, keep_default_na=False, chunksize=CHUNK_SIZE, encoding='utf-8'
+    )
+
+
+def _parse_integers(column: pd.Series):
+    # Devuelve los valores como Int64 (vacío -> NA) y la máscara de los que no son enteros
+    blank = (column.str.strip() == '').to_numpy()
+    values = pd.to_numeric(column, errors='coerce')
+    invalid = (values.isna().to_numpy() & ~blank) | (values.fillna(0).to_numpy() % 1 != 0)
+    return values.where(~invalid).astype('Int64'), invalid
+
+
+def normalize_chunk(chunk: pd.DataFrame):
+    """Convierte las columnas enteras y separa las filas que no se pueden comparar.
+
+    Devuelve ``(validas, rechazadas, retenidas)``. Como en ``parse_elector_chunk``, una
+    cédula vacía, no numérica o no positiva, o un código no numérico, rechazan la fila.
+    ``retenidas`` son las cédulas legibles de las filas rechazadas: siguen en el padrón
+    aunque su fila no se pueda aplicar.
+    """
+    checks = []
+    cedulas, invalid = _parse_integers(chunk['numero_cedula'])
+    bad_cedula = invalid | cedulas.isna().to_numpy() | (cedulas.fillna(0) <= 0).to_numpy()
+    checks.append((invalid | cedulas.isna().to_numpy(), 'numero_cedula no es un entero'))
+    checks.append((~invalid & (cedulas.fillna(1) <= 0).to_numpy(), 'numero_cedula fuera de rango'))
+    codes = {}
+    for column in CODE_COLUMNS:
+        codes[column], invalid = _parse_integers(chunk[column])
+        checks.append((invalid, f'{column} no es un entero'))
+
+    rejected = np.logical_or.reduce([mask for mask, _ in checks])
+    rejects = pd.DataFrame({
+        'linea': [','.join(row) for row in chunk[rejected].itertuples(index=False)],
+        'motivo': ['; '.join(reason for mask, reason in checks if mask[i]) for i in np.flatnonzero(rejected)],
+    })
+
+    cedulas = cedulas.fillna(0).astype('int64')
+    held = cedulas[rejected & ~bad_cedula].to_numpy()
+    chunk = chunk.assign(numero_cedula=cedulas, **codes)
+    return chunk[~rejected], rejects, held
+
+
+def build_signature(chunks, rejects: RejectWriter = None):
+    cedulas = []
+    hashes = []
+    held = [np.empty(0, dtype=np.int64)]
+    rejected = 0
+    for chunk in chunks:
+        chunk, rejected_rows, held_cedulas = normalize_chunk(chunk)
+        rejected += len(rejected_rows)
+        held.append(held_cedulas)
+        if rejects is not None:
+            rejects.write(rejected_rows)
+        cedulas.append(chunk['numero_cedula'].to_numpy())
+        hashes.append(pd.util.hash_pandas_object(chunk[HASH_COLUMNS], index=False).to_numpy())
+
+    held = np.unique(np.concatenate(held))
+    if not cedulas:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint64), 0, rejected, held
+
+    cedulas = np.concatenate(cedulas)
+    hashes = np.concatenate(hashes)
+    order = np.argsort(cedulas, kind='stable')
+    cedulas = cedulas[order]
+    hashes = hashes[order]
+
+    # Si una cédula aparece repetida se conserva su primera aparición
+    unique, first = np.unique(cedulas, return_index=True)
+    return unique, hashes[first], len(cedulas) - len(unique), rejected, held
+
+
+def compare_signatures(new_cedulas, new_hashes, old_cedulas, old_hashes, held=None):
+    # held: cédulas de filas rechazadas del archivo. Siguen publicadas, así que no
+    # son bajas, y como su fila no es válida tampoco se insertan ni se actualizan
+    if held is None:
+        held = np.empty(0, dtype=np.int64)
+    common, new_idx, old_idx = np.intersect1d(
+        new_cedulas, old_cedulas, assume_unique=True, return_indices=True
+    )
+    changed = common[new_hashes[new_idx] != old_hashes[old_idx]]
+    return {
+        'inserts': np.setdiff1d(np.setdiff1d(new_cedulas, old_cedulas, assume_unique=True), held),
+        'updates': np.setdiff1d(changed, held),
+        'removals': np.setdiff1d(np.setdiff1d(old_cedulas, new_cedulas, assume_unique=True), held),
+        'unchanged': int(np.count_nonzero(new_hashes[new_idx] == old_hashes[old_idx])),
+    }
+
+
+def _copy_dataframe(cursor, sql: str, df: pd.DataFrame):
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False, quoting=csv.QUOTE_NONNUMERIC)
+    buffer.seek(0)
+    cursor.copy_expert(sql, buffer)
+
+
+def apply_delta(filepath: str, encoding: str, delta, db: Session):
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(
+            "CREATE TEMP TABLE electores_delta (LIKE electores INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+        cursor.execute("CREATE TEMP TABLE electores_bajas (numero_cedula bigint) ON COMMIT DROP")
+
+        # Segunda pasada por el archivo: solo viajan a PostgreSQL las filas nuevas o modificadas
+        changed = np.concatenate([delta['inserts'], delta['updates']])
+        if len(changed):
+            for chunk in read_snapshot_chunks(filepath, encoding):
+                chunk, _, _ = normalize_chunk(chunk)
+                selected = chunk[np.isin(chunk['numero_cedula'].to_numpy(), changed)]
+                if len(selected):
+                    _copy_dataframe(cursor, COPY_DELTA_SQL, selected)
+
+        if len(delta['removals']):
+            _copy_dataframe(
+                cursor, "COPY electores_bajas (numero_cedula) FROM STDIN WITH (FORMAT csv)",
+                pd.DataFrame({'numero_cedula': delta['removals']})
+            )
+    finally:
+        cursor.close()
+
+    # Igual que en build_signature, ante cédulas repetidas gana la primera fila del archivo
+    latest = (
+        f"(SELECT DISTINCT ON (numero_cedula) {', '.join(ELECTOR_COLUMNS)} "
+        f"FROM electores_delta ORDER BY numero_cedula, ctid)"
+    )
+    assignments = ', '.join(f"{column} = d.{column}" for column in UPDATE_COLUMNS)
+    updated = db.execute(text(
+        f"UPDATE electores e SET {assignments} FROM {latest} d "
+        f"WHERE e.numero_cedula = d.numero_cedula"
+    )).rowcount
+    inserted = db.execute(text(
+        f"INSERT INTO electores ({', '.join(ELECTOR_COLUMNS)}) "
+        f"SELECT {', '.join(ELECTOR_COLUMNS)} FROM {latest} d "
+        f"WHERE NOT EXISTS (SELECT 1 FROM electores e WHERE e.numero_cedula = d.numero_cedula)"
+    )).rowcount
+    removed = db.execute(text(
+        "DELETE FROM electores e USING electores_bajas b WHERE e.numero_cedula = b.numero_cedula"
+    )).rowcount
+    return {'inserted': inserted, 'updated': updated, 'removed': removed}
+
+
+def delta_import(filepath: str, db: Session, encoding: str = None, dry_run: bool = False):
+    encoding = detect_encoding(filepath, override=encoding)
+    start = time.perf_counter()
+
+    # Las filas del archivo que no se pueden comparar no se aplican; quedan en este archivo con su motivo
+    rejects_path = f"{filepath}.delta_rejects.csv"
+    if os.path.exists(rejects_path):
+        os.remove(rejects_path)
+    rejects = RejectWriter(rejects_path)
+
+    logging.info(f"Hashing snapshot {filepath} ({encoding})")
+    new_cedulas, new_hashes, new_duplicates, _, held = build_signature(
+        read_snapshot_chunks(filepath, encoding), rejects
+    )
+    if rejects.count:
+        logging.warning(f"{rejects.count} rows from {filepath} rejected, see {rejects.path}")
+
+    logging.info("Hashing current electores table")
+    with tempfile.TemporaryFile() as buffer:
+        old_cedulas, old_hashes, old_duplicates, old_rejected, _ = build_signature(read_table_chunks(db, buffer))
+    if old_rejected:
+        # Sin cédula válida no se pueden emparejar con el archivo: la importación no las toca
+        logging.warning(f"{old_rejected} electores rows without a valid numero_cedula ignored")
+
+    if new_duplicates or old_duplicates:
+        logging.warning(
+            f"Duplicated cédulas ignored: {new_duplicates} in snapshot, {old_duplicates} in table"
+        )
+
+    delta = compare_signatures(new_cedulas, new_hashes, old_cedulas, old_hashes, held)
+    if len(held):
+        logging.warning(f"{len(held)} cédulas with rejected rows left as they are in electores")
+    summary = {
+        'inserts': len(delta['inserts']),
+        'updates': len(delta['updates']),
+        'removals': len(delta['removals']),
+        'unchanged': delta['unchanged'],
+        'rejected': rejects.count,
+    }
+    logging.info(
+        f"Delta: {summary['inserts']} inserts, {summary['updates']} updates, "
+        f"{summary['removals']} removals, {summary['unchanged']} unchanged, {summary['rejected']} rejected "
+        f"({time.perf_counter() - start:.1f}s)"
+    )
+    if dry_run:
+        db.rollback()
+        return summary
+
+    try:
+        applied = apply_delta(filepath, encoding, delta, db)
+        db.commit()
+        publish_invalidation()
+    except Exception as e:
+        logging.error(f"Error applying delta: {e}")
+        db.rollback()
+        raise
+
+    logging.info(
+        f"Applied: {applied['inserted']} inserted, {applied['updated']} updated, "
+        f"{applied['removed']} removed in {time.perf_counter() - start:.1f}s"
+    )
+    summary.update(applied)
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Aplica solo los cambios de un nuevo padrón sobre electores")
+    parser.add_argument('snapshot', help="Archivo del padrón publicado (p. ej. data/re20240416_pp.txt)")
+    parser.add_argument('--encoding', default=None,
+                        help="Codificación del archivo (por defecto: se detecta)")
+    parser.add_argument('--dry-run', action='store_true', help="Solo calcula y muestra los conteos")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        delta_import(args.snapshot, db, encoding=args.encoding, dry_run=args.dry_run)
+    finally:
+        db.close()
@@ -0,0 +1,124 @@
+# Detalle de un elector (elector + centro de votación + geografía) en una sola consulta
+#
+# Sustituye a las tres consultas ORM encadenadas que hacían los endpoints de
+# búsqueda por cédula: un único SELECT con LEFT JOIN y columnas planas, sin
+# construir entidades ORM. Si se pasan los datos de referencia en memoria
+# (app/reference_data.py) solo se consulta electores y el resto sale de ahí.
+# Las variantes *_async hacen lo mismo con una AsyncSession (app/database.py).
+from sqlalchemy import Integer, and_, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import Elector, Geografico, CentroVotacion
+
+DETAIL_SECTIONS = (
+    ('elector', Elector.__table__),
+    ('centro_votacion', CentroVotacion.__table__),
+    ('geografico', Geografico.__table__),
+)
+
+_elector = Elector.__table__
+_centro = CentroVotacion.__table__
+_geografico = Geografico.__table__
+
+_DETAIL_SELECT = (
+    select(*[
+        column.label(f'{section}__{column.key}')
+        for section, table in DETAIL_SECTIONS
+        for column in table.columns
+    ])
+    .select_from(
+        _elector
+        .outerjoin(_centro, _centro.c.codificacion_nueva_cv == _elector.c.codigo_centro_votacion)
+        .outerjoin(_geografico, and_(
+            _geografico.c.codigo_estado == _elector.c.codigo_estado,
+            _geografico.c.codigo_municipio == _elector.c.codigo_municipio,
+            _geografico.c.codigo_parroquia == _elector.c.codigo_parroquia,
+        ))
+    )
+)
+
+ELECTOR_DETAIL_QUERY = _DETAIL_SELECT.limit(1)
+
+# Varias cédulas en una sola consulta con un único parámetro de tipo array;
+# DISTINCT ON conserva una fila por cédula igual que el LIMIT 1 de la búsqueda individual
+ELECTOR_DETAILS_QUERY = (
+    _DETAIL_SELECT
+    .where(_elector.c.numero_cedula == any_(bindparam('cedulas', type_=ARRAY(Integer))))
+    .distinct(_elector.c.numero_cedula)
+    .order_by(_elector.c.numero_cedula)
+)
+
+_ELECTOR_SELECT = select(*_elector.columns)
+ELECTOR_ONLY_QUERY = _ELECTOR_SELECT.limit(1)
+ELECTORES_ONLY_QUERY = (
+    _ELECTOR_SELECT
+    .where(_elector.c.numero_cedula == any_(bindparam('cedulas', type_=ARRAY(Integer))))
+    .distinct(_elector.c.numero_cedula)
+    .order_by(_elector.c.numero_cedula)
+)
+
+
+def _with_reference(row, reference):
+    elector = dict(row._mapping)
+    return {
+        'elector': elector,
+        'centro_votacion': reference.centro(elector['codigo_centro_votacion']),
+        'geografico': reference.geografico(
+            elector['codigo_estado'], elector['codigo_municipio'], elector['codigo_parroquia']
+        ),
+    }
+
+
+def row_to_detail(row):
+    # Mismo formato que devolvían los endpoints: una sección sin fila asociada es None
+    mapping = row._mapping
+    detail = {}
+    for section, table in DETAIL_SECTIONS:
+        values = {column.key: mapping[f'{section}__{column.key}'] for column in table.columns}
+        detail[section] = values if values['id'] is not None else None
+    return detail
+
+
+def get_elector_detail(db: Session, numero_cedula, reference=None):
+    if reference is not None:
+        row = db.execute(ELECTOR_ONLY_QUERY.where(_elector.c.numero_cedula == numero_cedula)).first()
+        return _with_reference(row, reference) if row is not None else None
+    row = db.execute(ELECTOR_DETAIL_QUERY.where(_elector.c.numero_cedula == numero_cedula)).first()
+    if row is None:
+        return None
+    return row_to_detail(row)
+
+
+def get_elector_details(db: Session, numeros_cedula, reference=None):
+    """Devuelve ``{numero_cedula: detalle}`` solo para las cédulas que existen."""
+    if not numeros_cedula:
+        return {}
+    if reference is not None:
+        rows = db.execute(ELECTORES_ONLY_QUERY, {'cedulas': list(numeros_cedula)})
+        return {row._mapping['numero_cedula']: _with_reference(row, reference) for row in rows}
+    rows = db.execute(ELECTOR_DETAILS_QUERY, {'cedulas': list(numeros_cedula)})
+    return {row._mapping['elector__numero_cedula']: row_to_detail(row) for row in rows}
+
+
+async def get_elector_detail_async(db: AsyncSession, numero_cedula, reference=None):
+    if reference is not None:
+        result = await db.execute(ELECTOR_ONLY_QUERY.where(_elector.c.numero_cedula == numero_cedula))
+        row = result.first()
+        return _with_reference(row, reference) if row is not None else None
+    result = await db.execute(ELECTOR_DETAIL_QUERY.where(_elector.c.numero_cedula == numero_cedula))
+    row = result.first()
+    if row is None:
+        return None
+    return row_to_detail(row)
+
+
+async def get_elector_details_async(db: AsyncSession, numeros_cedula, reference=None):
+    if not numeros_cedula:
+        return {}
+    if reference is not None:
+        rows = await db.execute(ELECTORES_ONLY_QUERY, {'cedulas': list(numeros_cedula)})
+        return {row._mapping['numero_cedula']: _with_reference(row, reference) for row in rows}
+    rows = await db.execute(ELECTOR_DETAILS_QUERY, {'cedulas': list(numeros_cedula)})
+    return {row._mapping['elector__numero_cedula']: row_to_detail(row) for row in rows}
@@ -0,0 +1,121 @@
+import os
+import json
+import logging
+from chardet.universaldetector import UniversalDetector
+
+# Bytes máximos que se leen para detectar la codificación de un archivo
+SAMPLE_SIZE = 1024 * 1024
+# La muestra se reparte en varias ventanas a lo largo del archivo, para no
+# decidir solo con la cabecera y las primeras filas
+SAMPLE_WINDOWS = 8
+BLOCK_SIZE = 64 * 1024
+
+# Si la muestra es solo ASCII no dice nada de los acentos del resto del archivo:
+# se usa la codificación histórica de los archivos del CNE, que contiene a ASCII
+DEFAULT_ENCODING = 'windows-1252'
+
+# Caché persistente en un archivo por cada archivo detectado (.<nombre>.encoding, junto a él):
+# {size, mtime_ns, encoding, version}. Al no compartir archivo, los procesos que cargan
+# partes en paralelo no se pisan las entradas entre sí
+CACHE_SUFFIX = '.encoding'
+# Las entradas de otra versión se ignoran: las anteriores guardaban utf-8 para muestras ASCII
+CACHE_VERSION = 2
+
+_memory_cache = {}
+
+
+def _file_signature(file_path):
+    stat = os.stat(file_path)
+    return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns
+
+
+def _cache_path(file_path):
+    directory, filename = os.path.split(os.path.abspath(file_path))
+    return os.path.join(directory, f".{filename}{CACHE_SUFFIX}")
+
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_cached_encoding(file_path):
+    signature = _file_signature(file_path)
+    if signature in _memory_cache:
+        return _memory_cache[signature]
+
+    _, size, mtime_ns = signature
+    entry = _read_cache(_cache_path(file_path))
+    if (entry and entry.get('size') == size and entry.get('mtime_ns') == mtime_ns
+            and entry.get('version') == CACHE_VERSION):
+        _memory_cache[signature] = entry['encoding']
+        return entry['encoding']
+    return None
+
+
+def remember_encoding(file_path, encoding):
+    signature = _file_signature(file_path)
+    _memory_cache[signature] = encoding
+
+    _, size, mtime_ns = signature
+    cache_path = _cache_path(file_path)
+    entry = {'size': size, 'mtime_ns': mtime_ns, 'encoding': encoding, 'version': CACHE_VERSION}
+    # Escritura atómica: quien lea a la vez ve la entrada anterior o la nueva, nunca media
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        # La caché es solo una optimización: un directorio de solo lectura no impide la carga
+        logging.warning(f"Could not write encoding cache {cache_path}: {e}")
+
+
+def _sample_offsets(file_size, sample_size, windows):
+    if file_size <= sample_size:
+        return [(0, file_size)]
+    window_size = sample_size // windows
+    step = file_size // windows
+    return [(i * step, window_size) for i in range(windows)]
+
+
+def sniff_encoding(file_path, sample_size=SAMPLE_SIZE, windows=SAMPLE_WINDOWS, default=DEFAULT_ENCODING):
+    detector = UniversalDetector()
+    file_size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        for offset, length in _sample_offsets(file_size, sample_size, windows):
+            f.seek(offset)
+            if offset:
+                f.readline()  # Alinear la ventana al inicio de una línea
+            remaining = length
+            while remaining > 0 and not detector.done:
+                block = f.read(min(BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                detector.feed(block)
+                remaining -= len(block)
+            if detector.done:
+                break
+    detector.close()
+
+    encoding = detector.result.get('encoding')
+    # Una muestra puramente ASCII no descarta bytes acentuados fuera de ella
+    if not encoding or encoding.lower() == 'ascii':
+        return default
+    return encoding
+
+
+def detect_encoding(file_path, override=None, default=DEFAULT_ENCODING):
+    if override:
+        return override
+
+    encoding = get_cached_encoding(file_path)
+    if encoding:
+        return encoding
+
+    encoding = sniff_encoding(file_path, default=default)
+    remember_encoding(file_path, encoding)
+    return encoding
@@ -0,0 +1,293 @@
+# Cliente compartido de la API de Green API (WhatsApp)
+#
+# Un único httpx.AsyncClient por proceso, con conexiones keep-alive, timeouts por
+# llamada y un límite de peticiones simultáneas. El cliente vive en su propio event
+# loop, en un hilo aparte, porque los helpers de WhatsApp se llaman desde rutas
+# async, desde endpoints síncronos con asyncio.run y desde el bot: call() se puede
+# esperar desde cualquier event loop y siempre reutiliza el mismo pool.
+#
+# Puede haber varias instancias de Green API (GREEN_API_INSTANCES). Cada una tiene
+# su planificador de envíos (app/send_scheduler.py), con los tokens en Redis para
+# que la API y el bot compartan la cuota, y su estado de salud; los
+# envíos se reparten entre las instancias sanas según GREEN_API_BALANCING:
+#   hash          siempre la misma instancia para un destinatario (por defecto),
+#                 así el QR, el mensaje y el contacto de un ticket llegan desde el mismo número
+#   least_loaded  la instancia con menos envíos en cola y en curso
+# El resto de llamadas (checkWhatsapp, getSettings, reboot) van a la primera instancia sana.
+import os
+import time
+import asyncio
+import hashlib
+import contextlib
+import logging
+import threading
+from collections import deque
+
+import httpx
+
+from app.send_scheduler import SendScheduler, RedisTokenBucket, send_bucket_key, PRIORITY_NORMAL
+
+GREEN_API_TIMEOUT = float(os.getenv("GREEN_API_TIMEOUT", "15"))
+GREEN_API_CONNECT_TIMEOUT = float(os.getenv("GREEN_API_CONNECT_TIMEOUT", "5"))
+GREEN_API_MAX_CONNECTIONS = int(os.getenv("GREEN_API_MAX_CONNECTIONS", "20"))
+GREEN_API_MAX_KEEPALIVE = int(os.getenv("GREEN_API_MAX_KEEPALIVE", "10"))
+GREEN_API_KEEPALIVE_EXPIRY = float(os.getenv("GREEN_API_KEEPALIVE_EXPIRY", "60"))
+# Peticiones en curso a la vez; el resto espera su turno
+GREEN_API_MAX_CONCURRENCY = int(os.getenv("GREEN_API_MAX_CONCURRENCY", "10"))
+
+# idInstance:apiToken[@apiUrl] separados por comas; vacío = solo API_URL_BASE/API_TOKEN
+GREEN_API_INSTANCES = os.getenv("GREEN_API_INSTANCES", "")
+GREEN_API_HOST = os.getenv("GREEN_API_HOST", "https://7103.api.greenapi.com")
+BALANCING_HASH = 'hash'
+BALANCING_LEAST_LOADED = 'least_loaded'
+GREEN_API_BALANCING = os.getenv("GREEN_API_BALANCING", BALANCING_HASH)
+# Errores seguidos tras los que una instancia se aparta, y durante cuántos segundos
+GREEN_API_UNHEALTHY_AFTER = int(os.getenv("GREEN_API_UNHEALTHY_AFTER", "3"))
+GREEN_API_UNHEALTHY_COOLDOWN = float(os.getenv("GREEN_API_UNHEALTHY_COOLDOWN", "60"))
+# Ventana para el cálculo de envíos por minuto
+THROUGHPUT_WINDOW = 60
+
+# Métodos que cuentan para el límite de envíos de la instancia
+SEND_METHODS = frozenset({'sendMessage', 'sendFileByUpload', 'sendContact'})
+
+
+class GreenAPIInstance:
+    """Una instancia de Green API con su cuota de envíos, salud y contadores."""
+
+    def __init__(self, name: str, base_url: str, token: str):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.token = token
+        self.scheduler = None
+        self.in_flight = 0
+        self.requests = 0
+        self.sent = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.unhealthy_until = 0.0
+        self.last_error = None
+        self._recent_sends = deque()
+
+    def url(self, method: str) -> str:
+        return f"{self.base_url}/{method}/{self.token}"
+
+    def healthy(self, now: float = None) -> bool:
+        return (now or time.monotonic()) >= self.unhealthy_until
+
+    def load(self) -> int:
+        queued = self.scheduler.queue_depth() if self.scheduler is not None else 0
+        return queued + self.in_flight
+
+    def record_success(self, is_send: bool):
+        self.requests += 1
+        self.consecutive_errors = 0
+        self.unhealthy_until = 0.0
+        if is_send:
+            now = time.monotonic()
+            self.sent += 1
+            self._recent_sends.append(now)
+            while self._recent_sends and self._recent_sends[0] < now - THROUGHPUT_WINDOW:
+                self._recent_sends.popleft()
+
+    def record_failure(self, error: str):
+        self.requests += 1
+        self.errors += 1
+        self.consecutive_errors += 1
+        self.last_error = error
+        # Tras la pausa vuelve a recibir tráfico; un éxito la da por recuperada
+        if self.consecutive_errors >= GREEN_API_UNHEALTHY_AFTER:
+            if self.healthy():
+                logging.warning(
+                    f"Green API instance {self.name} marked unhealthy after "
+                    f"{self.consecutive_errors} consecutive errors: {error}"
+                )
+            self.unhealthy_until = time.monotonic() + GREEN_API_UNHEALTHY_COOLDOWN
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            'instance': self.name,
+            'healthy': self.healthy(now),
+            'unhealthy_for': round(max(self.unhealthy_until - now, 0), 1),
+            'in_flight': self.in_flight,
+            'requests': self.requests,
+            'sent': self.sent,
+            'sent_last_minute': sum(1 for sent_at in list(self._recent_sends) if sent_at >= now - THROUGHPUT_WINDOW),
+            'errors': self.errors,
+            'consecutive_errors': self.consecutive_errors,
+            'last_error': self.last_error,
+            'envios': self.scheduler.stats() if self.scheduler is not None else None,
+        }
+
+
+def load_instances(default_base_url: str, default_token: str, spec: str = GREEN_API_INSTANCES):
+    instances = []
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        credentials, _, host = entry.partition('@')
+        instance_id, _, token = credentials.partition(':')
+        if not instance_id or not token:
+            raise ValueError(f"GREEN_API_INSTANCES: se esperaba idInstance:apiToken[@apiUrl], no {entry!r}")
+        base_url = f"{(host or GREEN_API_HOST).rstrip('/')}/waInstance{instance_id}"
+        instances.append(GreenAPIInstance(instance_id, base_url, token))
+    if not instances:
+        instances.append(GreenAPIInstance(default_base_url.rstrip('/').rsplit('waInstance', 1)[-1],
+                                          default_base_url, default_token))
+    return instances
+
+
+def _rendezvous_score(recipient: str, instance: GreenAPIInstance) -> bytes:
+    return hashlib.blake2b(f"{recipient}:{instance.name}".encode(), digest_size=8).digest()
+
+
+class GreenAPIGateway:
+    """Peticiones a {base_url}/{método}/{token} sobre un pool de conexiones compartido."""
+
+    def __init__(self, instances, timeout: float = GREEN_API_TIMEOUT,
+                 max_concurrency: int = GREEN_API_MAX_CONCURRENCY, balancing: str = GREEN_API_BALANCING,
+                 redis_url: str = None):
+        if balancing not in (BALANCING_HASH, BALANCING_LEAST_LOADED):
+            raise ValueError(f"GREEN_API_BALANCING debe ser {BALANCING_HASH} o {BALANCING_LEAST_LOADED}")
+        self.instances = list(instances)
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.balancing = balancing
+        # Sin redis_url cada proceso limita sus envíos por su cuenta
+        self.redis_url = redis_url
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._client = None
+        self._semaphore = None
+        # Contadores propios: no dependen de los detalles internos de httpx/httpcore
+        self.in_flight = 0
+        self.waiting = 0
+        self.requests = 0
+
+    def _start(self):
+        with self._lock:
+            if self._loop is not None:
+                return self._loop
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                self._client = httpx.AsyncClient(
+                    timeout=httpx.Timeout(self.timeout, connect=GREEN_API_CONNECT_TIMEOUT),
+                    limits=httpx.Limits(
+                        max_connections=GREEN_API_MAX_CONNECTIONS,
+                        max_keepalive_connections=GREEN_API_MAX_KEEPALIVE,
+                        keepalive_expiry=GREEN_API_KEEPALIVE_EXPIRY,
+                    ),
+                )
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                for instance in self.instances:
+                    shared = None
+                    if self.redis_url:
+                        shared = RedisTokenBucket(self.redis_url, send_bucket_key(instance.name))
+                    instance.scheduler = SendScheduler(shared=shared)
+                ready.set()
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name='green-api', daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            return loop
+
+    def instance(self, name: str) -> GreenAPIInstance:
+        for instance in self.instances:
+            if instance.name == str(name):
+                return instance
+        raise ValueError(f"Unknown Green API instance {name}")
+
+    def choose(self, method: str, recipient=None) -> GreenAPIInstance:
+        now = time.monotonic()
+        candidates = [instance for instance in self.instances if instance.healthy(now)]
+        if not candidates:
+            # Todas apartadas: mejor intentarlo con la que antes vuelve que no enviar
+            return min(self.instances, key=lambda instance: instance.unhealthy_until)
+        if method not in SEND_METHODS:
+            return candidates[0]
+        if self.balancing == BALANCING_HASH and recipient is not None:
+            # Rendezvous hashing: si una instancia se aparta solo cambian sus destinatarios
+            return max(candidates, key=lambda instance: _rendezvous_score(str(recipient), instance))
+        return min(candidates, key=lambda instance: (instance.load(), -instance.scheduler.tokens))
+
+    @contextlib.asynccontextmanager
+    async def _slot(self):
+        # Turno dentro de max_concurrency, contando quién espera y quién está en curso
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        self.requests += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    async def _request(self, http_method, method, timeout, priority, recipient, instance, **kwargs):
+        instance = self.instance(instance) if instance is not None else self.choose(method, recipient)
+        is_send = method in SEND_METHODS
+        if is_send:
+            await instance.scheduler.acquire(priority or PRIORITY_NORMAL)
+        instance.in_flight += 1
+        try:
+            async with self._slot():
+                response = await self._client.request(
+                    http_method, instance.url(method),
+                    timeout=timeout if timeout is not None else self.timeout, **kwargs
+                )
+        except httpx.TransportError as e:
+            instance.record_failure(f"{e.__class__.__name__}: {e}")
+            raise
+        finally:
+            instance.in_flight -= 1
+        # 429 y 5xx son de la instancia; un 4xx es problema de la petición
+        if response.status_code == 429 or response.status_code >= 500:
+            instance.record_failure(f"HTTP {response.status_code}")
+        else:
+            instance.record_success(is_send)
+        return response
+
+    async def call(self, http_method: str, method: str, timeout: float = None, priority: str = None,
+                   recipient=None, instance: str = None, **kwargs) -> httpx.Response:
+        """Hace la petición en el loop del cliente y devuelve la respuesta ya leída."""
+        loop = self._start()
+        future = asyncio.run_coroutine_threadsafe(
+            self._request(http_method, method, timeout, priority, recipient, instance, **kwargs), loop
+        )
+        return await asyncio.wrap_future(future)
+
+    async def post(self, method: str, timeout: float = None, priority: str = None, recipient=None,
+                   instance: str = None, **kwargs) -> httpx.Response:
+        return await self.call('POST', method, timeout, priority, recipient, instance, **kwargs)
+
+    async def get(self, method: str, timeout: float = None, instance: str = None) -> httpx.Response:
+        return await self.call('GET', method, timeout, instance=instance)
+
+    def stats(self):
+        return {
+            'started': self._loop is not None,
+            'balancing': self.balancing,
+            'max_concurrency': self.max_concurrency,
+            'max_connections': GREEN_API_MAX_CONNECTIONS,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'requests': self.requests,
+            'instancias': [instance.stats() for instance in self.instances],
+        }
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join()
+        loop.close()
@@ -1,56 +1,148 @@
+# Carga del padrón con deduplicación por lotes
+#
+# Uso (desde la raíz del repo, como app.cargadb): python -m app.load_data
 import os
 import csv
 from datetime import datetime
+import numpy as np
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
-from database import SessionLocal
-from models import Elector, Geografico, CentroVotacion
-import chardet
+from app.database import SessionLocal
+from app.models import Elector, Geografico, CentroVotacion
+from app.file_encoding import detect_encoding
+from app.local_cache import publish_invalidation
 import logging
 from tqdm import tqdm
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def detect_encoding(file_path):
-    with open(file_path, 'rb') as f:
-        result = chardet.detect(f.read())
-        return result['encoding']
+# Filas por lote: una sola verificación vectorizada y un INSERT multi-fila por lote
+BATCH_SIZE = 50000
 
-def load_electors(filepath: str, db: Session):
-    encoding = detect_encoding(filepath)
+
+class CedulaBitmap:
+    """Conjunto compacto de números de cédula: un bit por cada número posible.
+
+    Con cédulas por debajo de 100 millones ocupa unos 12 MB, frente a los
+    cientos de MB de un ``set`` de Python con el mismo contenido.
+    """
+
+    def __init__(self, max_value: int = 0):
+        self._bits = np.zeros((max_value >> 3) + 1, dtype=np.uint8)
+
+    def _grow(self, max_value: int):
+        needed = (max_value >> 3) + 1
+        if needed > len(self._bits):
+            bits = np.zeros(max(needed, len(self._bits) * 2), dtype=np.uint8)
+            bits[:len(self._bits)] = self._bits
+            self._bits = bits
+
+    def contains(self, cedulas: np.ndarray) -> np.ndarray:
+        result = np.zeros(len(cedulas), dtype=bool)
+        in_range = (cedulas >= 0) & (cedulas < len(self._bits) * 8)
+        values = cedulas[in_range]
+        masks = np.left_shift(1, values & 7).astype(np.uint8)
+        result[in_range] = (self._bits[values >> 3] & masks) != 0
+        return result
+
+    def add(self, cedulas: np.ndarray):
+        if len(cedulas) == 0:
+            return
+        self._grow(int(cedulas.max()))
+        masks = np.left_shift(1, cedulas & 7).astype(np.uint8)
+        np.bitwise_or.at(self._bits, cedulas >> 3, masks)
+
+    def discard(self, cedulas: np.ndarray):
+        if len(cedulas) == 0:
+            return
+        masks = np.left_shift(1, cedulas & 7).astype(np.uint8)
+        np.bitwise_and.at(self._bits, cedulas >> 3, ~masks)
+
+
+def load_existing_cedulas(db: Session) -> CedulaBitmap:
+    bitmap = CedulaBitmap()
+    result = db.execute(
+        select(Elector.numero_cedula)
+        .where(Elector.numero_cedula.isnot(None))
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+    for partition in result.scalars().partitions():
+        bitmap.add(np.fromiter(partition, dtype=np.int64, count=len(partition)))
+    return bitmap
+
+
+def _elector_mapping(row):
+    return {
+        "letra_cedula": row[0],
+        "numero_cedula": int(row[1]),
+        "p_apellido": row[2],
+        "s_apellido": row[3],
+        "p_nombre": row[4],
+        "s_nombre": row[5],
+        "sexo": row[6],
+        "fecha_nacimiento": datetime.strptime(row[7], '%Y-%m-%d'),
+        "codigo_estado": int(row[8]),
+        "codigo_municipio": int(row[9]),
+        "codigo_parroquia": int(row[10]),
+        "codigo_centro_votacion": int(row[11])
+    }
+
+
+def _insert_new_electors(batch, existing: CedulaBitmap, db: Session):
+    cedulas = np.fromiter((int(row[1]) for row in batch), dtype=np.int64, count=len(batch))
+
+    # Primera aparición de cada cédula dentro del lote que no exista ya en la tabla
+    _, first_index = np.unique(cedulas, return_index=True)
+    is_new = np.zeros(len(batch), dtype=bool)
+    is_new[first_index] = True
+    is_new &= ~existing.contains(cedulas)
+
+    new_rows = [_elector_mapping(batch[i]) for i in np.flatnonzero(is_new)]
+    if new_rows:
+        db.execute(insert(Elector), new_rows)
+        existing.add(cedulas[is_new])
+    return cedulas[is_new]
+
+
+def load_electors(filepath: str, db: Session, encoding: str = None, existing: CedulaBitmap = None):
+    # existing se construye una vez por ejecución y se comparte entre archivos: cada
+    # archivo le añade las cédulas que inserta, sin volver a leer toda la tabla
+    encoding = detect_encoding(filepath, override=encoding)
     logging.info(f"Loading electors from {filepath} with encoding {encoding}")
+    if existing is None:
+        existing = load_existing_cedulas(db)
+    added_cedulas = []
     try:
+        inserted = 0
+        skipped = 0
         with open(filepath, 'r', encoding=encoding) as file:
             reader = csv.reader(file)
             next(reader)  # Skip the header
 
+            batch = []
             for row in tqdm(reader, desc=f"Loading Electors from {os.path.basename(filepath)}", unit=" lines"):
-                numero_cedula = int(row[1])
-                # Verificar si el elector ya existe
-                exists = db.query(Elector).filter(Elector.numero_cedula == numero_cedula).first()
-                if not exists:
-                    elector = Elector(
-                        letra_cedula=row[0],
-                        numero_cedula=numero_cedula,
-                        p_apellido=row[2],
-                        s_apellido=row[3],
-                        p_nombre=row[4],
-                        s_nombre=row[5],
-                        sexo=row[6],
-                        fecha_nacimiento=datetime.strptime(row[7], '%Y-%m-%d'),
-                        codigo_estado=int(row[8]),
-                        codigo_municipio=int(row[9]),
-                        codigo_parroquia=int(row[10]),
-                        codigo_centro_votacion=int(row[11])
-                    )
-                    db.add(elector)
+                batch.append(row)
+                if len(batch) >= BATCH_SIZE:
+                    added_cedulas.append(_insert_new_electors(batch, existing, db))
+                    inserted += len(added_cedulas[-1])
+                    skipped += len(batch) - len(added_cedulas[-1])
+                    batch = []
+            if batch:
+                added_cedulas.append(_insert_new_electors(batch, existing, db))
+                inserted += len(added_cedulas[-1])
+                skipped += len(batch) - len(added_cedulas[-1])
             db.commit()
+        logging.info(f"Inserted {inserted} electors, skipped {skipped} existing or duplicated")
     except Exception as e:
         logging.error(f"Error loading electors: {e}")
         db.rollback()
+        # Lo que no se confirmó tampoco cuenta como existente para los siguientes archivos
+        for cedulas in added_cedulas:
+            existing.discard(cedulas)
 
-def load_geographic_data(filepath: str, db: Session):
-    encoding = detect_encoding(filepath)
+def load_geographic_data(filepath: str, db: Session, encoding: str = None):
+    encoding = detect_encoding(filepath, override=encoding)
     logging.info(f"Loading geographic data from {filepath} with encoding {encoding}")
     try:
         with open(filepath, 'r', encoding=encoding) as file:
@@ -72,8 +164,8 @@ def load_geographic_data(filepath: str, db: Session):
         logging.error(f"Error loading geographic data: {e}")
         db.rollback()
 
-def load_voting_centers(filepath: str, db: Session):
-    encoding = detect_encoding(filepath)
+def load_voting_centers(filepath: str, db: Session, encoding: str = None):
+    encoding = detect_encoding(filepath, override=encoding)
     logging.info(f"Loading voting centers from {filepath} with encoding {encoding}")
     try:
         with open(filepath, 'r', encoding=encoding) as file:
@@ -103,10 +195,11 @@ if __name__ == '__main__':
     try:
         # Cargar los archivos divididos de electores
         input_dir = 'data/split_files'
+        existing = load_existing_cedulas(db)
         for filename in os.listdir(input_dir):
             filepath = os.path.join(input_dir, filename)
             if filename.endswith('.csv'):
-                load_electors(filepath, db)
+                load_electors(filepath, db, existing=existing)
         
         # Cargar los datos geográficos
         load_geographic_data('data/geo20240416_pp.txt', db)
@@ -115,3 +208,5 @@ if __name__ == '__main__':
         load_voting_centers('data/cva20240416.txt', db)
     finally:
         db.close()
+        # Los workers de la API descartan lo que tengan en memoria del padrón anterior
+        publish_invalidation()
@@ -0,0 +1,156 @@
+# Caché en memoria del proceso (LRU con TTL) que va delante de Redis
+#
+# Cada worker de uvicorn tiene la suya. Las entradas caducan solas por TTL y se
+# invalidan antes de tiempo con un mensaje en el canal INVALIDATION_CHANNEL de
+# Redis, que publican los cargadores y los endpoints que modifican datos.
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+
+import redis as redis_sync
+
+from app.cache_keys import CACHE_GENERATION_KEY
+
+INVALIDATION_CHANNEL = 'cache:invalidate'
+# Mensaje que vacía la caché completa (p. ej. tras recargar el padrón)
+INVALIDATE_ALL = '*'
+
+LOCAL_CACHE_MAXSIZE = int(os.getenv("LOCAL_CACHE_MAXSIZE", "50000"))
+LOCAL_CACHE_TTL = float(os.getenv("LOCAL_CACHE_TTL", "300"))
+
+_MISSING = object()
+# Referencias a las tareas lanzadas por el listener, para que no las recoja el GC
+_background_tasks = set()
+
+
+class LocalCache:
+    """LRU acotada con caducidad por entrada y contadores de uso.
+
+    Es segura entre hilos: los endpoints síncronos de FastAPI corren en el
+    threadpool y comparten la instancia con los asíncronos.
+    """
+
+    def __init__(self, maxsize=LOCAL_CACHE_MAXSIZE, ttl=LOCAL_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if self._data.pop(key, _MISSING) is not _MISSING:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+
+def apply_invalidation(cache: LocalCache, message: str):
+    if message == INVALIDATE_ALL:
+        cache.clear()
+    else:
+        cache.delete(message)
+
+
+def _run_in_background(coroutine_function):
+    if coroutine_function is None:
+        return
+    task = asyncio.create_task(coroutine_function())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def listen_for_invalidations(redis, cache: LocalCache, on_invalidate_all=None):
+    # Se reconecta solo: una caída de Redis no debe dejar al worker sin invalidaciones.
+    # on_invalidate_all (una corrutina) reconstruye lo que dependa del padrón completo
+    reconnecting = False
+    while True:
+        try:
+            async with redis.pubsub() as pubsub:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Lo que cambió mientras no estábamos suscritos no llegó: se empieza de cero,
+                # también con lo que depende del padrón completo
+                cache.clear()
+                if reconnecting:
+                    _run_in_background(on_invalidate_all)
+                reconnecting = True
+                async for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        apply_invalidation(cache, message['data'])
+                        if message['data'] == INVALIDATE_ALL:
+                            _run_in_background(on_invalidate_all)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.warning(f"Cache invalidation listener disconnected: {e}")
+            await asyncio.sleep(5)
+
+
+def publish_invalidation(message: str = INVALIDATE_ALL, redis_url: str = None):
+    # Versión síncrona para los cargadores, que no corren dentro del event loop.
+    # Invalidarlo todo es pasar a una nueva generación de claves (app/cache_keys.py)
+    redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6380/0")
+    try:
+        client = redis_sync.Redis.from_url(redis_url)
+        try:
+            pipe = client.pipeline(transaction=False)
+            if message == INVALIDATE_ALL:
+                pipe.incr(CACHE_GENERATION_KEY)
+            pipe.publish(INVALIDATION_CHANNEL, message)
+            pipe.execute()
+        finally:
+            client.close()
+    except redis_sync.RedisError as e:
+        # La carga ya terminó: sin Redis las entradas caducan igualmente por TTL
+        logging.warning(f"Could not publish cache invalidation: {e}")
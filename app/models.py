@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Boolean, ForeignKey, Index, Text, DateTime, func
+from sqlalchemy import Column, Integer, BigInteger, String, Date, Boolean, ForeignKey, Index, Text, DateTime, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -36,6 +36,10 @@ class Geografico(Base):
     municipio = Column(String(35))
     parroquia = Column(String(35))
 
+    __table_args__ = (
+        Index('ix_geograficos_ubicacion', 'codigo_estado', 'codigo_municipio', 'codigo_parroquia'),
+    )
+
 class CentroVotacion(Base):
     __tablename__ = 'centros_votacion'
 
@@ -49,6 +53,10 @@ class CentroVotacion(Base):
     nombre_cv = Column(String(255))
     direccion_cv = Column(String(755))
 
+    __table_args__ = (
+        Index('ix_centros_votacion_codificacion_nueva_cv', 'codificacion_nueva_cv'),
+    )
+
 
 class Recolector(Base):
     __tablename__ = 'recolectores'
@@ -102,4 +110,43 @@ class LineaTelefonica(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     numero = Column(String(20), unique=True, index=True)
-    operador = Column(String(50))
\ No newline at end of file
+    operador = Column(String(50))
+
+
+class LoadJournal(Base):
+    __tablename__ = 'load_journal'
+
+    id = Column(Integer, primary_key=True, index=True)
+    archivo = Column(String(500), unique=True, index=True)
+    tamano = Column(BigInteger)  # Tamaño y mtime identifican la versión del archivo
+    mtime_ns = Column(BigInteger)
+    byte_offset = Column(BigInteger, default=0)  # Posición tras la última fila confirmada
+    filas = Column(BigInteger, default=0)
+    completado = Column(Boolean, default=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class WhatsAppOutbox(Base):
+    __tablename__ = 'whatsapp_outbox'
+
+    id = Column(BigInteger, primary_key=True)
+    ticket_id = Column(Integer, ForeignKey('tickets.id', ondelete='CASCADE'), nullable=True)
+    telefono = Column(String(20), nullable=False)
+    tipo = Column(String(20), nullable=False)  # mensaje, qr o contacto
+    payload = Column(Text)  # JSON con los datos propios de cada tipo
+    # Envíos que salen juntos (p. ej. QR, mensaje y contacto de un ticket), en el orden de 'orden'
+    lote = Column(String(32), nullable=True)
+    orden = Column(Integer, nullable=True)
+    estado = Column(String(20), nullable=False, default='pendiente')  # pendiente, enviando, enviado, fallido
+    intentos = Column(Integer, nullable=False, default=0)
+    proximo_intento = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    ultimo_error = Column(Text)
+    enviado_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index('ix_whatsapp_outbox_estado_proximo_intento', 'estado', 'proximo_intento'),
+        Index('ix_whatsapp_outbox_ticket_id', 'ticket_id'),
+        Index('ix_whatsapp_outbox_lote_orden', 'lote', 'orden'),
+    )
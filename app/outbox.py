@@ -0,0 +1,221 @@
+# Cola persistente de envíos de WhatsApp (tabla whatsapp_outbox)
+#
+# Los endpoints no llaman a Green API: guardan los envíos en la misma transacción
+# que el ticket y responden de inmediato. OutboxWorker corre en cada worker de la
+# API y reparte los pendientes con FOR UPDATE SKIP LOCKED, de modo que varios
+# procesos pueden vaciar la cola a la vez sin enviar dos veces lo mismo.
+#
+# Estados: pendiente -> enviando -> enviado | pendiente (reintento) | fallido
+# Un envío que se queda en "enviando" (el proceso murió a mitad) vuelve a
+# tomarse cuando vence su plazo, OUTBOX_LEASE_SECONDS.
+#
+# Los envíos de un mismo lote salen en orden: uno no se toma mientras el anterior
+# siga pendiente o enviando. Si el anterior acaba en fallido, el lote continúa.
+import os
+import json
+import uuid
+import random
+import asyncio
+import logging
+from datetime import timedelta
+
+from sqlalchemy import and_, exists, func, select, update
+from sqlalchemy.orm import Session
+
+from app.models import WhatsAppOutbox
+
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "5"))
+OUTBOX_MAX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_MAX_BACKOFF_SECONDS", "900"))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "120"))
+
+PENDIENTE = 'pendiente'
+ENVIANDO = 'enviando'
+ENVIADO = 'enviado'
+FALLIDO = 'fallido'
+
+_outbox = WhatsAppOutbox.__table__
+_previous = _outbox.alias('anterior')
+
+
+def enqueue(db: Session, telefono: str, tipo: str, payload: dict = None, ticket_id: int = None,
+            lote: str = None, orden: int = None):
+    # No hace commit: el envío se confirma junto con lo que lo origina
+    job = WhatsAppOutbox(
+        ticket_id=ticket_id,
+        telefono=telefono,
+        tipo=tipo,
+        payload=json.dumps(payload) if payload is not None else None,
+        estado=PENDIENTE,
+        intentos=0,
+        lote=lote,
+        orden=orden,
+    )
+    db.add(job)
+    return job
+
+
+def enqueue_ticket_delivery(db: Session, ticket, message: str):
+    # Mismo orden que seguía el registro: QR, mensaje con el ticket y contacto de la empresa.
+    # Cada reenvío es un lote nuevo; el estado del ticket es el de su último lote
+    lote = uuid.uuid4().hex
+    return [
+        enqueue(db, ticket.telefono, 'qr', ticket_id=ticket.id, lote=lote, orden=0),
+        enqueue(db, ticket.telefono, 'mensaje', {'message': message}, ticket_id=ticket.id, lote=lote, orden=1),
+        enqueue(db, ticket.telefono, 'contacto', ticket_id=ticket.id, lote=lote, orden=2),
+    ]
+
+
+def result_error(result):
+    # Los helpers de WhatsApp de app/main.py devuelven el error en lugar de lanzarlo
+    if isinstance(result, dict) and result.get('status') in ('error', 'Error', 'api'):
+        return result.get('message') or result.get('detail') or str(result)
+    return None
+
+
+def backoff_seconds(intentos: int) -> float:
+    delay = min(OUTBOX_BACKOFF_SECONDS * 2 ** max(intentos - 1, 0), OUTBOX_MAX_BACKOFF_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _job_status(job):
+    return {
+        'id': job['id'],
+        'tipo': job['tipo'],
+        'estado': job['estado'],
+        'intentos': job['intentos'],
+        'ultimo_error': job['ultimo_error'],
+        'enviado_at': job['enviado_at'],
+    }
+
+
+def summarize(jobs):
+    if any(job['estado'] == FALLIDO for job in jobs):
+        return FALLIDO
+    if all(job['estado'] == ENVIADO for job in jobs):
+        return ENVIADO
+    return PENDIENTE
+
+
+async def delivery_status(db, ticket_id: int):
+    # Solo el último lote: un reenvío que llega bien deja atrás los fallos anteriores
+    latest = (
+        select(_outbox.c.lote).where(_outbox.c.ticket_id == ticket_id)
+        .order_by(_outbox.c.id.desc()).limit(1).correlate(None).scalar_subquery()
+    )
+    # Los envíos anteriores a los lotes (lote NULL) cuentan como un único lote
+    rows = (await db.execute(
+        select(_outbox).where(_outbox.c.ticket_id == ticket_id, _outbox.c.lote.is_not_distinct_from(latest))
+        .order_by(_outbox.c.orden, _outbox.c.id)
+    )).mappings().all()
+    if not rows:
+        return None
+    return {
+        'ticket_id': ticket_id,
+        'lote': rows[0]['lote'],
+        'estado': summarize(rows),
+        'envios': [_job_status(row) for row in rows],
+    }
+
+
+async def outbox_stats(db):
+    rows = await db.execute(select(_outbox.c.estado, func.count()).group_by(_outbox.c.estado))
+    stats = {PENDIENTE: 0, ENVIANDO: 0, ENVIADO: 0, FALLIDO: 0}
+    stats.update({estado: count for estado, count in rows})
+    return stats
+
+
+class OutboxWorker:
+    """Vacía whatsapp_outbox con los manejadores de cada tipo de envío."""
+
+    def __init__(self, session_factory, handlers, batch_size: int = OUTBOX_BATCH_SIZE,
+                 poll_seconds: float = OUTBOX_POLL_SECONDS, max_attempts: int = OUTBOX_MAX_ATTEMPTS):
+        # handlers: {tipo: async def handler(job: dict, db: AsyncSession) -> resultado}
+        self.session_factory = session_factory
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+
+    async def claim(self):
+        async with self.session_factory() as db:
+            async with db.begin():
+                ids = (await db.execute(
+                    select(_outbox.c.id)
+                    .where(
+                        _outbox.c.estado.in_((PENDIENTE, ENVIANDO)),
+                        _outbox.c.proximo_intento <= func.now(),
+                        # El siguiente del lote espera a que el anterior termine
+                        ~exists().where(and_(
+                            _previous.c.lote == _outbox.c.lote,
+                            _previous.c.orden < _outbox.c.orden,
+                            _previous.c.estado.in_((PENDIENTE, ENVIANDO)),
+                        )),
+                    )
+                    .order_by(_outbox.c.proximo_intento, _outbox.c.id)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )).scalars().all()
+                if not ids:
+                    return []
+                rows = (await db.execute(
+                    update(_outbox)
+                    .where(_outbox.c.id.in_(ids))
+                    .values(
+                        estado=ENVIANDO,
+                        intentos=_outbox.c.intentos + 1,
+                        proximo_intento=func.now() + timedelta(seconds=OUTBOX_LEASE_SECONDS),
+                    )
+                    .returning(*_outbox.columns)
+                )).mappings().all()
+        return sorted((dict(row) for row in rows), key=lambda job: job['id'])
+
+    async def deliver(self, job):
+        handler = self.handlers.get(job['tipo'])
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown outbox job type {job['tipo']}")
+            async with self.session_factory() as db:
+                error = result_error(await handler(job, db))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+        await self.finish(job, error)
+        return error is None
+
+    async def finish(self, job, error=None):
+        if error is None:
+            values = {'estado': ENVIADO, 'enviado_at': func.now(), 'ultimo_error': None}
+        elif job['intentos'] >= self.max_attempts:
+            values = {'estado': FALLIDO, 'ultimo_error': error}
+            logging.warning(f"Outbox job {job['id']} ({job['tipo']}) failed after {job['intentos']} attempts: {error}")
+        else:
+            values = {
+                'estado': PENDIENTE,
+                'ultimo_error': error,
+                'proximo_intento': func.now() + timedelta(seconds=backoff_seconds(job['intentos'])),
+            }
+        async with self.session_factory() as db:
+            async with db.begin():
+                await db.execute(update(_outbox).where(_outbox.c.id == job['id']).values(**values))
+
+    async def run_once(self):
+        jobs = await self.claim()
+        for job in jobs:
+            await self.deliver(job)
+        return len(jobs)
+
+    async def run(self):
+        while True:
+            try:
+                processed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"Outbox worker error: {e}")
+                processed = 0
+            if not processed:
+                await asyncio.sleep(self.poll_seconds)
@@ -0,0 +1,146 @@
+# Conversión y validación vectorizada de lotes del padrón electoral
+#
+# Cada lote de líneas se convierte en columnas con pandas/NumPy y se valida
+# columna a columna; las filas que no pasan se envían a un archivo de
+# rechazos junto con el motivo.
+import io
+import os
+import csv
+
+import numpy as np
+import pandas as pd
+
+# Columnas de la tabla electores en el orden del archivo del CNE
+ELECTOR_COLUMNS = (
+    'letra_cedula', 'numero_cedula', 'p_apellido', 's_apellido', 'p_nombre', 's_nombre',
+    'sexo', 'fecha_nacimiento', 'codigo_estado', 'codigo_municipio', 'codigo_parroquia',
+    'codigo_centro_votacion'
+)
+INT_COLUMNS = ('numero_cedula', 'codigo_estado', 'codigo_municipio', 'codigo_parroquia', 'codigo_centro_votacion')
+# Longitudes máximas según app/models.py
+MAX_LENGTHS = {
+    'letra_cedula': 1,
+    'p_apellido': 35,
+    's_apellido': 35,
+    'p_nombre': 35,
+    's_nombre': 35,
+    'sexo': 1,
+}
+LETRAS_CEDULA = ('V', 'E')
+
+
+STRING_COLUMNS = tuple(c for c in ELECTOR_COLUMNS if c not in INT_COLUMNS)
+
+
+def _read_lines(lines):
+    try:
+        # Las columnas enteras se dejan inferir al parser de C: si todo el lote
+        # es numérico llegan ya como int64 y no hay que convertirlas aparte
+        return pd.read_csv(
+            io.StringIO(''.join(lines)), header=None, names=list(ELECTOR_COLUMNS),
+            dtype={column: str for column in STRING_COLUMNS}, keep_default_na=False,
+            skip_blank_lines=False
+        ), None
+    except pd.errors.ParserError:
+        # Alguna línea trae columnas de más: se separan fila a fila solo en este lote
+        rows = list(csv.reader(lines))
+        bad_width = np.array([len(row) != len(ELECTOR_COLUMNS) for row in rows], dtype=bool)
+        padded = [row if len(row) == len(ELECTOR_COLUMNS) else [''] * len(ELECTOR_COLUMNS) for row in rows]
+        return pd.DataFrame(padded, columns=list(ELECTOR_COLUMNS)), bad_width
+
+
+def _to_int64(column: pd.Series):
+    if pd.api.types.is_integer_dtype(column):
+        return column.to_numpy(dtype='int64'), np.zeros(len(column), dtype=bool)
+    values = pd.to_numeric(column, errors='coerce')
+    invalid = values.isna().to_numpy() | (values.to_numpy() % 1 != 0)
+    return np.where(invalid, 0, values.fillna(0)).astype('int64'), invalid
+
+
+def parse_elector_chunk(lines):
+    """Convierte un lote de líneas CSV y separa las filas válidas de las rechazadas.
+
+    Devuelve ``(validas, rechazadas)``: ``validas`` es un DataFrame con las
+    columnas enteras ya convertidas a int64 y ``rechazadas`` tiene la línea
+    original y el motivo de cada rechazo.
+    """
+    df, bad_width = _read_lines(lines)
+
+    # Filas mal formadas: se rechazan con un único motivo y no se validan campo a campo
+    structural = np.array([not line.strip() for line in lines], dtype=bool)
+    # A las líneas cortas les falta al menos el último campo
+    last = df[ELECTOR_COLUMNS[-1]]
+    if not pd.api.types.is_integer_dtype(last):
+        structural |= (last.isna() | (last.astype(str) == '')).to_numpy()
+    if bad_width is not None:
+        structural |= bad_width
+
+    # Cada validación aporta una máscara; el texto del motivo solo se arma
+    # para las filas que terminan rechazadas
+    checks = []
+
+    for column in INT_COLUMNS:
+        values, invalid = _to_int64(df[column])
+        checks.append((invalid, f'{column} no es un entero'))
+        if column == 'numero_cedula':
+            checks.append((~invalid & (values <= 0), 'numero_cedula fuera de rango'))
+        df[column] = values
+
+    fecha = df['fecha_nacimiento']
+    fechas = pd.to_datetime(fecha, format='%Y-%m-%d', errors='coerce')
+    checks.append((fechas.isna().to_numpy() & (fecha != '').to_numpy(), 'fecha_nacimiento inválida'))
+
+    checks.append((~df['letra_cedula'].isin(LETRAS_CEDULA).to_numpy(), 'letra_cedula inválida'))
+    for column, max_length in MAX_LENGTHS.items():
+        checks.append((df[column].str.len().to_numpy() > max_length, f'{column} excede {max_length} caracteres'))
+
+    field_errors = np.logical_or.reduce([mask for mask, _ in checks]) & ~structural
+    rejected = structural | field_errors
+
+    motivos = []
+    for i in np.flatnonzero(rejected):
+        if structural[i]:
+            motivos.append('número de columnas inválido')
+        else:
+            motivos.append('; '.join(reason for mask, reason in checks if mask[i]))
+    rejects = pd.DataFrame({
+        'linea': [lines[i].rstrip('\r\n') for i in np.flatnonzero(rejected)],
+        'motivo': motivos,
+    })
+    return df[~rejected], rejects
+
+
+class RejectWriter:
+    """Acumula las filas rechazadas de una carga en un CSV con la línea y el motivo.
+
+    ``write`` escribe de inmediato. ``stage`` guarda las filas hasta ``flush``, para
+    que una carga por lotes solo las escriba cuando el lote ya está confirmado.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._staged = []
+
+    def truncate(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def write(self, rejects: pd.DataFrame):
+        if rejects.empty:
+            return
+        write_header = not os.path.exists(self.path)
+        rejects.to_csv(self.path, mode='a', index=False, header=write_header, encoding='utf-8')
+        self.count += len(rejects)
+
+    def stage(self, rejects: pd.DataFrame):
+        if not rejects.empty:
+            self._staged.append(rejects)
+
+    def discard(self):
+        self._staged = []
+
+    def flush(self):
+        staged, self._staged = self._staged, []
+        for rejects in staged:
+            self.write(rejects)
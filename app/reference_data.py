@@ -0,0 +1,191 @@
+# Datos de referencia en memoria: geograficos y centros_votacion
+#
+# Las dos tablas son pequeñas y casi nunca cambian, así que cada proceso las carga
+# una vez en diccionarios indexados por código. Quien las modifica incrementa el
+# contador REFERENCE_VERSION_KEY en Redis y los workers recargan al ver el cambio.
+import os
+import time
+import asyncio
+import logging
+import threading
+
+import redis as redis_sync
+from sqlalchemy import select
+
+from app.models import Geografico, CentroVotacion
+
+REFERENCE_VERSION_KEY = 'reference_data:version'
+# Cada cuántos segundos un worker comprueba si la versión cambió
+REFERENCE_DATA_POLL_SECONDS = float(os.getenv("REFERENCE_DATA_POLL_SECONDS", "30"))
+
+
+def _row_dict(row, table):
+    return {column.key: getattr(row, column.key) for column in table.columns}
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ReferenceData:
+    """Instantánea inmutable de geograficos y centros_votacion con sus índices."""
+
+    def __init__(self, geograficos, centros, version=None):
+        self.version = version
+        self.loaded_at = time.time()
+        self.estados = {}
+        self.municipios = {}
+        self.parroquias = {}
+        # Igual que el .first() de las consultas que reemplaza: gana la fila de menor id
+        for geo in geograficos:
+            self.estados.setdefault(geo['codigo_estado'], geo['estado'])
+            self.municipios.setdefault((geo['codigo_estado'], geo['codigo_municipio']), geo['municipio'])
+            self.parroquias.setdefault(
+                (geo['codigo_estado'], geo['codigo_municipio'], geo['codigo_parroquia']), geo
+            )
+
+        self.centros = {}
+        self.centros_por_ubicacion = {}
+        for centro in centros:
+            self.centros.setdefault(centro['codificacion_nueva_cv'], centro)
+        # Igual que DISTINCT ON (codificacion_nueva_cv) ... ORDER BY codificacion_nueva_cv, nombre_cv
+        # dentro de cada ubicación: gana el primer nombre_cv (los NULL al final, como en PostgreSQL)
+        vistos = set()
+        for centro in sorted(centros, key=lambda c: (c['codificacion_nueva_cv'], c['nombre_cv'] is None, c['nombre_cv'] or '')):
+            key = (centro['codigo_estado'], centro['codigo_municipio'], centro['codigo_parroquia'])
+            if (key, centro['codificacion_nueva_cv']) in vistos:
+                continue
+            vistos.add((key, centro['codificacion_nueva_cv']))
+            self.centros_por_ubicacion.setdefault(key, []).append(centro)
+
+    # Nombres a partir de códigos (None si no existen)
+    def estado_nombre(self, codigo_estado):
+        return self.estados.get(_as_int(codigo_estado))
+
+    def municipio_nombre(self, codigo_estado, codigo_municipio):
+        return self.municipios.get((_as_int(codigo_estado), _as_int(codigo_municipio)))
+
+    def parroquia_nombre(self, codigo_estado, codigo_municipio, codigo_parroquia):
+        geo = self.geografico(codigo_estado, codigo_municipio, codigo_parroquia)
+        return geo['parroquia'] if geo else None
+
+    def centro_nombre(self, codificacion_nueva_cv):
+        centro = self.centro(codificacion_nueva_cv)
+        return centro['nombre_cv'] if centro else None
+
+    # Filas completas
+    def geografico(self, codigo_estado, codigo_municipio, codigo_parroquia):
+        return self.parroquias.get(
+            (_as_int(codigo_estado), _as_int(codigo_municipio), _as_int(codigo_parroquia))
+        )
+
+    def centro(self, codificacion_nueva_cv):
+        return self.centros.get(_as_int(codificacion_nueva_cv))
+
+    # Listados para los selectores del frontend, ordenados por nombre
+    def list_estados(self):
+        return sorted(self.estados.items(), key=lambda item: item[1] or '')
+
+    def list_municipios(self, codigo_estado):
+        return sorted(
+            ((m, nombre) for (e, m), nombre in self.municipios.items() if e == codigo_estado),
+            key=lambda item: item[1] or ''
+        )
+
+    def list_parroquias(self, codigo_estado, codigo_municipio):
+        return sorted(
+            ((p, geo['parroquia']) for (e, m, p), geo in self.parroquias.items()
+             if e == codigo_estado and m == codigo_municipio),
+            key=lambda item: item[1] or ''
+        )
+
+    def centros_en(self, codigo_estado, codigo_municipio, codigo_parroquia):
+        return self.centros_por_ubicacion.get((codigo_estado, codigo_municipio, codigo_parroquia), [])
+
+    def centros_de_estado(self, codigo_estado):
+        return [c for c in self.centros.values() if c['codigo_estado'] == _as_int(codigo_estado)]
+
+    def stats(self):
+        return {
+            'version': self.version,
+            'loaded_at': self.loaded_at,
+            'geograficos': len(self.parroquias),
+            'centros_votacion': len(self.centros),
+        }
+
+
+def load_reference_data(engine, version=None):
+    geo_table = Geografico.__table__
+    centro_table = CentroVotacion.__table__
+    with engine.connect() as conn:
+        geograficos = [_row_dict(row, geo_table) for row in conn.execute(select(geo_table).order_by(geo_table.c.id))]
+        centros = [_row_dict(row, centro_table) for row in conn.execute(select(centro_table).order_by(centro_table.c.id))]
+    return ReferenceData(geograficos, centros, version)
+
+
+class ReferenceDataStore:
+    """Mantiene la instantánea vigente del proceso y la recarga cuando cambia la versión."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._data = None
+        self._lock = threading.Lock()
+
+    def get(self) -> ReferenceData:
+        data = self._data
+        if data is None:
+            # Primera petición antes de que termine la carga de arranque
+            with self._lock:
+                if self._data is None:
+                    self._data = load_reference_data(self.engine)
+                data = self._data
+        return data
+
+    def reload(self, version=None):
+        data = load_reference_data(self.engine, version)
+        self._data = data
+        logging.info(
+            f"Reference data loaded (version {version}): "
+            f"{len(data.parroquias)} geograficos, {len(data.centros)} centros"
+        )
+        return data
+
+    async def current_version(self, redis):
+        version = await redis.get(REFERENCE_VERSION_KEY)
+        return int(version) if version else 0
+
+    async def refresh(self, redis):
+        version = await self.current_version(redis)
+        await asyncio.to_thread(self.reload, version)
+
+    async def watch(self, redis, interval=REFERENCE_DATA_POLL_SECONDS):
+        while True:
+            try:
+                version = await self.current_version(redis)
+                if self._data is None or self._data.version != version:
+                    await asyncio.to_thread(self.reload, version)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"Could not refresh reference data: {e}")
+            await asyncio.sleep(interval)
+
+
+async def bump_reference_version(redis):
+    return await redis.incr(REFERENCE_VERSION_KEY)
+
+
+def bump_reference_version_sync(redis_url: str = None):
+    # Para los cargadores, que no corren dentro del event loop
+    redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6380/0")
+    try:
+        client = redis_sync.Redis.from_url(redis_url)
+        try:
+            client.incr(REFERENCE_VERSION_KEY)
+        finally:
+            client.close()
+    except redis_sync.RedisError as e:
+        logging.warning(f"Could not bump reference data version: {e}")
@@ -160,4 +160,20 @@ class LineaTelefonicaList(LineaTelefonicaBase):
         orm_mode = True
         
 class CedulaRequest(BaseModel):
-    numero_cedula: str
\ No newline at end of file
+    numero_cedula: str
+
+
+class CedulasBatchRequest(BaseModel):
+    numeros_cedula: List[str]
+
+
+class CedulaBatchResult(BaseModel):
+    numero_cedula: str
+    encontrado: bool
+    detalle: Optional[ElectorDetail] = None
+
+
+class CedulasBatchResponse(BaseModel):
+    total: int
+    encontrados: int
+    resultados: List[CedulaBatchResult]
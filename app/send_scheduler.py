@@ -0,0 +1,209 @@
+# Planificador de envíos de WhatsApp: token bucket con carriles de prioridad
+#
+# Cada instancia de Green API admite un ritmo de envíos limitado. Todos los envíos
+# (mensajes, archivos, contactos) piden un token antes de salir; los tokens se
+# reponen a GREEN_API_SEND_RATE por segundo hasta GREEN_API_SEND_BURST. Si hay
+# cola, siempre sale primero el carril de mayor prioridad: las confirmaciones de
+# ticket no esperan detrás de un envío masivo.
+#
+# La API (cada worker de uvicorn) y el bot son procesos distintos que envían por la
+# misma instancia, así que los tokens viven en Redis (RedisTokenBucket, un script
+# Lua atómico por instancia): GREEN_API_SEND_RATE es el ritmo total de la instancia,
+# no el de cada proceso. Los carriles de prioridad sí son de cada proceso. Si Redis
+# no responde, cada proceso sigue con su propio bucket en memoria hasta que vuelva.
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+GREEN_API_SEND_RATE = float(os.getenv("GREEN_API_SEND_RATE", "2"))
+GREEN_API_SEND_BURST = float(os.getenv("GREEN_API_SEND_BURST", "5"))
+
+# Carriles, de mayor a menor prioridad
+PRIORITY_TICKET = 'ticket'
+PRIORITY_NORMAL = 'normal'
+PRIORITY_BROADCAST = 'broadcast'
+PRIORITIES = (PRIORITY_TICKET, PRIORITY_NORMAL, PRIORITY_BROADCAST)
+
+
+# Toma un token si hay; si no, devuelve los segundos que faltan para el siguiente.
+# Usa el reloj de Redis para que todos los procesos repongan al mismo ritmo.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(now - updated, 0) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+return tostring(wait)
+"""
+
+
+def send_bucket_key(instance: str) -> str:
+    return f"green_api:send_bucket:{instance}"
+
+
+class RedisTokenBucket:
+    """Token bucket compartido por todos los procesos que envían por una instancia."""
+
+    def __init__(self, redis_url: str, key: str):
+        self.key = key
+        # Se crea dentro del event loop que lo usa; sin esperar mucho si Redis cae
+        self._redis = Redis.from_url(redis_url, socket_connect_timeout=1, socket_timeout=1)
+        self._script = self._redis.register_script(TOKEN_BUCKET_LUA)
+
+    async def take(self, rate: float, burst: float) -> float:
+        return float(await self._script(keys=[self.key], args=[rate, burst]))
+
+
+class _LaneStats:
+    def __init__(self):
+        self.sent = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float):
+        self.sent += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+
+class SendScheduler:
+    """Token bucket con una cola FIFO por carril. Debe usarse desde un único event loop."""
+
+    def __init__(self, rate: float = GREEN_API_SEND_RATE, burst: float = GREEN_API_SEND_BURST,
+                 shared: RedisTokenBucket = None):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.shared = shared
+        self.shared_errors = 0
+        self._shared_down = False
+        self._updated = time.monotonic()
+        self._lanes = {priority: deque() for priority in PRIORITIES}
+        self._stats = {priority: _LaneStats() for priority in PRIORITIES}
+        self._wakeup = asyncio.Event()
+        self._dispatcher = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _take_local(self) -> float:
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def _take(self) -> float:
+        # 0 si se obtuvo el token; si no, segundos hasta volver a intentarlo
+        if self.shared is not None:
+            try:
+                wait = await self.shared.take(self.rate, self.burst)
+            except RedisError as e:
+                self.shared_errors += 1
+                if not self._shared_down:
+                    logging.warning(f"Shared send bucket {self.shared.key} unavailable, using the local one: {e}")
+                    self._shared_down = True
+            else:
+                if self._shared_down:
+                    logging.info(f"Shared send bucket {self.shared.key} available again")
+                    self._shared_down = False
+                return wait
+        return self._take_local()
+
+    def _discard_cancelled(self):
+        for lane in self._lanes.values():
+            while lane and lane[0][0].done():
+                lane.popleft()
+
+    def _next_waiter(self):
+        for priority in PRIORITIES:
+            lane = self._lanes[priority]
+            while lane:
+                future, enqueued_at = lane.popleft()
+                # Quien se canceló mientras esperaba no consume token
+                if not future.done():
+                    return priority, future, enqueued_at
+        return None
+
+    def queue_depth(self):
+        return sum(len(lane) for lane in self._lanes.values())
+
+    async def acquire(self, priority: str = PRIORITY_NORMAL):
+        if priority not in self._lanes:
+            raise ValueError(f"Unknown send priority {priority}")
+        if self.rate <= 0:
+            return 0.0
+        # Sin cola y con token disponible se sale sin esperar
+        if not self.queue_depth() and await self._take() == 0:
+            self._stats[priority].record(0.0)
+            return 0.0
+
+        future = asyncio.get_running_loop().create_future()
+        self._lanes[priority].append((future, time.monotonic()))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        self._wakeup.set()
+        return await future
+
+    async def _dispatch(self):
+        while True:
+            if not self.queue_depth():
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            # Solo se pide token si queda alguien esperando
+            self._discard_cancelled()
+            if not self.queue_depth():
+                continue
+            retry_in = await self._take()
+            if retry_in > 0:
+                await asyncio.sleep(retry_in)
+                continue
+            waiter = self._next_waiter()
+            if waiter is None:
+                continue
+            priority, future, enqueued_at = waiter
+            wait = time.monotonic() - enqueued_at
+            self._stats[priority].record(wait)
+            future.set_result(wait)
+
+    def stats(self):
+        # Se puede llamar desde otro hilo: no toca el estado del bucket
+        tokens = min(self.burst, self.tokens + (time.monotonic() - self._updated) * self.rate)
+        return {
+            'rate': self.rate,
+            'burst': self.burst,
+            'shared': self.shared.key if self.shared is not None else None,
+            'shared_available': self.shared is not None and not self._shared_down,
+            'shared_errors': self.shared_errors,
+            # Con el bucket compartido, solo cuenta mientras Redis no responde
+            'local_tokens': round(tokens, 2),
+            'queue_depth': self.queue_depth(),
+            'lanes': {
+                priority: {
+                    'queued': len(self._lanes[priority]),
+                    'sent': stats.sent,
+                    'avg_wait_ms': round(stats.total_wait / stats.sent * 1000, 1) if stats.sent else 0.0,
+                    'max_wait_ms': round(stats.max_wait * 1000, 1),
+                }
+                for priority, stats in self._stats.items()
+            },
+        }
@@ -0,0 +1,249 @@
+# Snapshots columnares (Parquet) de las tablas de referencia
+#
+# Uso:
+#   python -m app.snapshot export [--output-dir data/snapshots]
+#   python -m app.snapshot import data/snapshots/20240416T120000 [--bulk]
+#
+# Cada snapshot es un directorio versionado con un archivo Parquet por tabla y un
+# manifest.json con la revisión de alembic, las filas y el sha256 de cada archivo.
+# Recargar desde un snapshot evita volver a parsear los archivos de texto del CNE.
+import os
+import io
+import json
+import time
+import hashlib
+import argparse
+import logging
+import tempfile
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, Integer, String, text
+
+from app.database import engine
+from app.models import Elector, Geografico, CentroVotacion
+from app.local_cache import publish_invalidation
+from app.reference_data import bump_reference_version_sync
+from app.cargadb import (
+    DROPPED_INDEXES_FILENAME, drop_secondary_indexes, rebuild_indexes, rebuild_indexes_after_failure, analyze_electores
+)
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+SNAPSHOT_TABLES = (Geografico.__table__, CentroVotacion.__table__, Elector.__table__)
+MANIFEST_FILENAME = 'manifest.json'
+# Filas por row group: permite leer el snapshot por partes sin cargarlo entero en memoria
+ROW_GROUP_SIZE = 500000
+# Bytes del CSV de COPY que pyarrow convierte de una vez
+READ_BLOCK_SIZE = 64 * 1024 * 1024
+
+
+def _arrow_type(column):
+    if isinstance(column.type, BigInteger):
+        return pa.int64()
+    if isinstance(column.type, Integer):
+        return pa.int32()
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp('us')
+    if isinstance(column.type, Date):
+        return pa.date32()
+    if isinstance(column.type, String):
+        return pa.string()
+    raise TypeError(f"Unsupported column type {column.type!r} for {column}")
+
+
+def arrow_schema(table):
+    return pa.schema([pa.field(column.name, _arrow_type(column)) for column in table.columns])
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def current_revision(conn):
+    return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+
+def export_table(conn, table, path):
+    schema = arrow_schema(table)
+    columns = ', '.join(schema.names)
+    with tempfile.TemporaryFile() as buffer:
+        cursor = conn.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY (SELECT {columns} FROM {table.name} ORDER BY id) TO STDOUT WITH (FORMAT csv)", buffer
+            )
+        finally:
+            cursor.close()
+        buffer.seek(0)
+
+        # En el CSV de COPY un NULL es un campo vacío sin comillas y una cadena vacía es ""
+        reader = pa_csv.open_csv(
+            buffer,
+            read_options=pa_csv.ReadOptions(column_names=schema.names, block_size=READ_BLOCK_SIZE),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=schema, strings_can_be_null=True, quoted_strings_can_be_null=False
+            ),
+        )
+        rows = 0
+        with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+            for batch in reader:
+                writer.write_table(pa.Table.from_batches([batch], schema=schema), row_group_size=ROW_GROUP_SIZE)
+                rows += batch.num_rows
+    return rows
+
+
+def export_snapshot(output_dir: str):
+    version = datetime.now().strftime('%Y%m%dT%H%M%S')
+    snapshot_dir = os.path.join(output_dir, version)
+    os.makedirs(snapshot_dir)
+
+    start = time.perf_counter()
+    # Una sola transacción REPEATABLE READ: todas las tablas salen del mismo instante
+    with engine.connect().execution_options(isolation_level='REPEATABLE READ') as conn:
+        manifest = {
+            'version': version,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'alembic_revision': current_revision(conn),
+            'tables': {},
+        }
+        for table in SNAPSHOT_TABLES:
+            table_start = time.perf_counter()
+            filename = f'{table.name}.parquet'
+            path = os.path.join(snapshot_dir, filename)
+            rows = export_table(conn, table, path)
+            manifest['tables'][table.name] = {'file': filename, 'rows': rows, 'sha256': _file_sha256(path)}
+            logging.info(f"Exported {rows} rows from {table.name} in {time.perf_counter() - table_start:.1f}s")
+
+    with open(os.path.join(snapshot_dir, MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    logging.info(f"Snapshot {snapshot_dir} written in {time.perf_counter() - start:.1f}s")
+    return snapshot_dir
+
+
+def read_manifest(snapshot_dir: str):
+    with open(os.path.join(snapshot_dir, MANIFEST_FILENAME), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def import_table(cursor, table, path):
+    schema = arrow_schema(table)
+    parquet = pq.ParquetFile(path)
+    if parquet.schema_arrow.names != schema.names:
+        raise ValueError(
+            f"{path} has columns {parquet.schema_arrow.names}, expected {schema.names} for {table.name}"
+        )
+
+    sql = f"COPY {table.name} ({', '.join(schema.names)}) FROM STDIN WITH (FORMAT csv, HEADER false)"
+    rows = 0
+    for group in range(parquet.num_row_groups):
+        batch = parquet.read_row_group(group)
+        buffer = io.BytesIO()
+        # pyarrow escribe las cadenas entre comillas y los nulos como campo vacío,
+        # que es justo lo que COPY distingue como '' y NULL
+        pa_csv.write_csv(batch, buffer, write_options=pa_csv.WriteOptions(include_header=False))
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+        rows += batch.num_rows
+    return rows
+
+
+def import_snapshot(snapshot_dir: str, bulk: bool = False, force: bool = False):
+    manifest = read_manifest(snapshot_dir)
+    timings = {}
+
+    start = time.perf_counter()
+    for table in SNAPSHOT_TABLES:
+        entry = manifest['tables'][table.name]
+        if _file_sha256(os.path.join(snapshot_dir, entry['file'])) != entry['sha256']:
+            raise ValueError(f"Checksum mismatch for {entry['file']} in {snapshot_dir}")
+    timings['verify'] = time.perf_counter() - start
+
+    with engine.connect() as conn:
+        revision = current_revision(conn)
+    if revision != manifest['alembic_revision'] and not force:
+        raise ValueError(
+            f"Snapshot {manifest['version']} was taken at revision {manifest['alembic_revision']}, "
+            f"database is at {revision} (use --force to import anyway)"
+        )
+
+    indexes = None
+    if bulk:
+        start = time.perf_counter()
+        indexes = drop_secondary_indexes(os.path.join(snapshot_dir, DROPPED_INDEXES_FILENAME))
+        timings['drop indexes'] = time.perf_counter() - start
+
+    try:
+        start = time.perf_counter()
+        # Todo o nada: si algo falla las tablas quedan como estaban
+        with engine.begin() as conn:
+            conn.execute(text(f"TRUNCATE {', '.join(t.name for t in SNAPSHOT_TABLES)} RESTART IDENTITY"))
+            cursor = conn.connection.cursor()
+            try:
+                for table in SNAPSHOT_TABLES:
+                    entry = manifest['tables'][table.name]
+                    rows = import_table(cursor, table, os.path.join(snapshot_dir, entry['file']))
+                    if rows != entry['rows']:
+                        raise ValueError(f"{table.name}: read {rows} rows, manifest says {entry['rows']}")
+                    # Los ids vienen del snapshot: la secuencia continúa después del mayor
+                    cursor.execute(
+                        f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                        f"COALESCE(MAX(id), 0) + 1, false) FROM {table.name}"
+                    )
+                    logging.info(f"Imported {rows} rows into {table.name}")
+            finally:
+                cursor.close()
+        timings['load'] = time.perf_counter() - start
+    except BaseException:
+        if indexes is not None:
+            rebuild_indexes_after_failure(indexes, os.path.join(snapshot_dir, DROPPED_INDEXES_FILENAME))
+        raise
+
+    if indexes is not None:
+        start = time.perf_counter()
+        rebuild_indexes(indexes, os.path.join(snapshot_dir, DROPPED_INDEXES_FILENAME))
+        timings['rebuild indexes'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for table in SNAPSHOT_TABLES:
+            if table.name != 'electores':
+                conn.execute(text(f"ANALYZE {table.name}"))
+    analyze_electores()
+    timings['analyze'] = time.perf_counter() - start
+
+    bump_reference_version_sync()
+    publish_invalidation()
+    for phase, seconds in timings.items():
+        logging.info(f"Phase {phase}: {seconds:.1f}s")
+    return manifest
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Exporta o recarga snapshots Parquet de las tablas de referencia")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="Escribe un nuevo snapshot versionado")
+    export_parser.add_argument('--output-dir', default='data/snapshots',
+                               help="Directorio de snapshots (por defecto: %(default)s)")
+
+    import_parser = subparsers.add_parser('import', help="Reemplaza las tablas con el contenido de un snapshot")
+    import_parser.add_argument('snapshot_dir', help="Directorio del snapshot (p. ej. data/snapshots/20240416T120000)")
+    import_parser.add_argument('--bulk', action='store_true',
+                               help="Retira los índices secundarios de electores durante la carga")
+    import_parser.add_argument('--force', action='store_true',
+                               help="Importa aunque la revisión de alembic no coincida")
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        export_snapshot(args.output_dir)
+    else:
+        import_snapshot(args.snapshot_dir, bulk=args.bulk, force=args.force)
@@ -1,39 +1,133 @@
+# División del padrón en partes UTF-8 para la carga en paralelo
+#
+# Uso (desde la raíz del repo): python -m app.split_csv [archivo] [directorio_salida]
 import os
-import csv
+import json
+import codecs
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 
-def split_csv_file(input_file, output_dir, lines_per_file):
+import numpy as np
+
+from app.file_encoding import remember_encoding
+
+# Tamaño de los bloques que se leen, recodifican y escriben de una vez
+BUFFER_SIZE = 16 * 1024 * 1024
+MANIFEST_FILENAME = 'manifest.json'
+
+
+def find_part_ranges(input_file, lines_per_file, buffer_size=BUFFER_SIZE):
+    # Devuelve la cabecera y los rangos de bytes [inicio, fin) de cada parte,
+    # cortando siempre justo después de un salto de línea
+    ranges = []
+    with open(input_file, 'rb') as f:
+        header = f.readline()
+        start = f.tell()
+        position = start
+        rows = 0
+        last_byte = header[-1:]
+
+        while True:
+            block = f.read(buffer_size)
+            if not block:
+                break
+            newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord('\n'))
+            used = 0
+            while len(newlines) - used >= lines_per_file - rows:
+                used += lines_per_file - rows
+                end = position + int(newlines[used - 1]) + 1
+                ranges.append((start, end, lines_per_file))
+                start = end
+                rows = 0
+            rows += len(newlines) - used
+            position += len(block)
+            last_byte = block[-1:]
+
+        # Última parte incompleta (y una última línea sin salto de línea final)
+        if position > start:
+            if last_byte != b'\n':
+                rows += 1
+            ranges.append((start, position, rows))
+    return header, ranges
+
+
+def write_part(input_file, output_path, header, start, end, source_encoding, buffer_size=BUFFER_SIZE):
+    decoder = codecs.getincrementaldecoder(source_encoding)()
+    digest = hashlib.sha256()
+    with open(input_file, 'rb') as src, open(output_path, 'wb') as dst:
+        dst.write(header)
+        digest.update(header)
+        src.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = src.read(min(buffer_size, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            data = decoder.decode(block).encode('utf-8')
+            dst.write(data)
+            digest.update(data)
+        data = decoder.decode(b'', final=True).encode('utf-8')
+        dst.write(data)
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def split_csv_file(input_file, output_dir, lines_per_file, source_encoding='windows-1252', workers=None):
     # Crear el directorio de salida si no existe
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    with open(input_file, 'r', encoding='windows-1252') as file:
-        reader = csv.reader(file)
-        header = next(reader)  # Leer la cabecera
-        file_number = 1
-        lines_written = 0
-
-        output_file = open(os.path.join(output_dir, f'part_{file_number}.csv'), 'w', newline='', encoding='utf-8')
-        writer = csv.writer(output_file)
-        writer.writerow(header)  # Escribir la cabecera en el archivo de salida
-
-        for row in reader:
-            if lines_written >= lines_per_file:
-                output_file.close()
-                file_number += 1
-                lines_written = 0
-                output_file = open(os.path.join(output_dir, f'part_{file_number}.csv'), 'w', newline='', encoding='utf-8')
-                writer = csv.writer(output_file)
-                writer.writerow(header)  # Escribir la cabecera en el nuevo archivo
-
-            writer.writerow(row)
-            lines_written += 1
-
-        output_file.close()
-
-# Configuración
-input_file_path ='/app/app/data/re20240416_pp.txt'
-output_directory = '/app/app/data/split_files'
-lines_per_file = 100000  # Ajusta el número de líneas por archivo según tus necesidades
-
-# Dividir el archivo
-split_csv_file(input_file_path, output_directory, lines_per_file)
+    header, ranges = find_part_ranges(input_file, lines_per_file)
+    header = header.decode(source_encoding).encode('utf-8')
+
+    parts = [
+        {'name': f'part_{number}.csv', 'rows': rows, 'byte_start': start, 'byte_end': end}
+        for number, (start, end, rows) in enumerate(ranges, start=1)
+    ]
+
+    # Cada parte es independiente: se recodifican y escriben en paralelo
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = [
+            executor.submit(
+                write_part, input_file, os.path.join(output_dir, part['name']), header,
+                part['byte_start'], part['byte_end'], source_encoding
+            )
+            for part in parts
+        ]
+        for part, future in zip(parts, futures):
+            part['sha256'] = future.result()
+
+    for part in parts:
+        # Las partes se escriben en UTF-8: los cargadores no necesitan detectarlo
+        remember_encoding(os.path.join(output_dir, part['name']), 'utf-8')
+
+    manifest = {
+        'source': os.path.abspath(input_file),
+        'source_encoding': source_encoding,
+        'encoding': 'utf-8',
+        'lines_per_file': lines_per_file,
+        'total_rows': sum(part['rows'] for part in parts),
+        'parts': parts,
+    }
+    with open(os.path.join(output_dir, MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Divide el padrón en partes UTF-8 de N líneas")
+    parser.add_argument('input_file', nargs='?', default='/app/app/data/re20240416_pp.txt')
+    parser.add_argument('output_dir', nargs='?', default='/app/app/data/split_files')
+    parser.add_argument('--lines-per-file', type=int, default=100000,
+                        help="Líneas por archivo (por defecto: %(default)s)")
+    parser.add_argument('--encoding', default='windows-1252',
+                        help="Codificación del archivo de entrada (por defecto: %(default)s)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Procesos de escritura en paralelo (por defecto: núcleos disponibles)")
+    args = parser.parse_args()
+
+    # Dividir el archivo
+    manifest = split_csv_file(args.input_file, args.output_dir, args.lines_per_file, args.encoding, args.workers)
+    print(f"{len(manifest['parts'])} partes, {manifest['total_rows']} filas en {args.output_dir}")
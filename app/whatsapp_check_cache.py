@@ -0,0 +1,124 @@
+# Caché de checkWhatsapp: teléfono -> existsWhatsapp
+#
+# Dos niveles, como el detalle de electores: LocalCache en el worker y Redis
+# compartido (whatsapp:check:{telefono}). Las respuestas positivas duran mucho más
+# que las negativas, porque un número sin WhatsApp puede activarlo en cualquier
+# momento. Los errores de la API no se guardan.
+#
+# Las consultas simultáneas del mismo número se agrupan: solo la primera llama a
+# Green API y las demás esperan su resultado. check_whatsapp se ejecuta tanto en el
+# event loop del worker como con asyncio.run desde el threadpool, así que la
+# agrupación usa concurrent.futures y el cliente síncrono de Redis en un hilo.
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+
+import redis as redis_sync
+
+from app.local_cache import LocalCache
+
+WHATSAPP_CHECK_TTL = int(os.getenv("WHATSAPP_CHECK_TTL", str(7 * 24 * 3600)))
+WHATSAPP_CHECK_NEGATIVE_TTL = int(os.getenv("WHATSAPP_CHECK_NEGATIVE_TTL", "600"))
+# Las entradas del worker caducan antes para no divergir mucho de Redis
+WHATSAPP_CHECK_LOCAL_TTL = int(os.getenv("WHATSAPP_CHECK_LOCAL_TTL", "300"))
+WHATSAPP_CHECK_CACHE_SIZE = int(os.getenv("WHATSAPP_CHECK_CACHE_SIZE", "20000"))
+
+
+def whatsapp_check_key(phone_number: str) -> str:
+    return f"whatsapp:check:{phone_number}"
+
+
+def normalize_phone(phone_number) -> str:
+    return ''.join(ch for ch in str(phone_number) if ch.isdigit())
+
+
+class WhatsAppCheckCache:
+    """Resultados de checkWhatsapp en memoria y en Redis, con peticiones agrupadas."""
+
+    def __init__(self, redis_url: str, positive_ttl: int = WHATSAPP_CHECK_TTL,
+                 negative_ttl: int = WHATSAPP_CHECK_NEGATIVE_TTL):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.local = LocalCache(maxsize=WHATSAPP_CHECK_CACHE_SIZE, ttl=WHATSAPP_CHECK_LOCAL_TTL)
+        # Si Redis no responde se consulta Green API directamente, sin esperar mucho
+        self._redis = redis_sync.Redis.from_url(
+            redis_url, decode_responses=True, socket_connect_timeout=1, socket_timeout=1
+        )
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.redis_hits = 0
+        self.upstream_calls = 0
+        self.coalesced = 0
+
+    def _read_redis(self, key):
+        try:
+            return self._redis.get(key)
+        except redis_sync.RedisError as e:
+            logging.warning(f"Could not read WhatsApp check cache: {e}")
+            return None
+
+    def _write_redis(self, key, value, ttl):
+        try:
+            self._redis.set(key, value, ex=ttl)
+        except redis_sync.RedisError as e:
+            logging.warning(f"Could not write WhatsApp check cache: {e}")
+
+    async def get(self, phone_number, fetch):
+        """Devuelve el resultado en caché o el de ``await fetch(phone_number)``."""
+        phone = normalize_phone(phone_number) or str(phone_number)
+        key = whatsapp_check_key(phone)
+        result = self.local.get(key)
+        if result is not None:
+            return result
+
+        with self._lock:
+            future = self._inflight.get(phone)
+            leader = future is None
+            if leader:
+                future = self._inflight[phone] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return await asyncio.wrap_future(future)
+
+        try:
+            result = await self._lookup(phone_number, key, fetch)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(phone, None)
+        future.set_result(result)
+        return result
+
+    async def _lookup(self, phone_number, key, fetch):
+        cached = await asyncio.to_thread(self._read_redis, key)
+        if cached is not None:
+            self.redis_hits += 1
+            result = {"existsWhatsapp": cached == '1'}
+            ttl = self.positive_ttl if result["existsWhatsapp"] else self.negative_ttl
+            self.local.set(key, result, ttl=min(ttl, WHATSAPP_CHECK_LOCAL_TTL))
+            return result
+
+        self.upstream_calls += 1
+        result = await fetch(phone_number)
+        if isinstance(result, dict) and "existsWhatsapp" in result:
+            exists = bool(result["existsWhatsapp"])
+            ttl = self.positive_ttl if exists else self.negative_ttl
+            self.local.set(key, result, ttl=min(ttl, WHATSAPP_CHECK_LOCAL_TTL))
+            await asyncio.to_thread(self._write_redis, key, '1' if exists else '0', ttl)
+        return result
+
+    def stats(self):
+        return {
+            'local': self.local.stats(),
+            'redis_hits': self.redis_hits,
+            'upstream_calls': self.upstream_calls,
+            'coalesced': self.coalesced,
+            'inflight': len(self._inflight),
+            'positive_ttl': self.positive_ttl,
+            'negative_ttl': self.negative_ttl,
+        }
@@ -0,0 +1,113 @@
+# Prueba de carga: endpoints async def con Session síncrona vs AsyncSession
+#
+# Uso: python -m benchmarks.bench_async_endpoints --requests 2000 --concurrency 1 10 50
+#
+# Monta dos apps FastAPI mínimas con la misma búsqueda por cédula que
+# /electores/cedula_no_cache/{numero_cedula}: una como estaba (async def que llama
+# a la Session de get_db y bloquea el event loop) y otra con get_async_db.
+# Las peticiones van por ASGI en el mismo proceso y event loop, como en un worker
+# de uvicorn, así que solo se mide la capa de acceso a datos contra PostgreSQL.
+import time
+import random
+import asyncio
+import argparse
+
+import httpx
+import numpy as np
+from fastapi import FastAPI, Depends, HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal, async_engine, get_db, get_async_db
+from app.elector_detail import get_elector_detail, get_elector_detail_async
+
+
+def build_sync_app():
+    app = FastAPI()
+
+    @app.get("/electores/{numero_cedula}")
+    async def lookup(numero_cedula: int, db: Session = Depends(get_db)):
+        result = get_elector_detail(db, numero_cedula)
+        if not result:
+            raise HTTPException(status_code=404)
+        return result
+
+    return app
+
+
+def build_async_app():
+    app = FastAPI()
+
+    @app.get("/electores/{numero_cedula}")
+    async def lookup(numero_cedula: int, db: AsyncSession = Depends(get_async_db)):
+        result = await get_elector_detail_async(db, numero_cedula)
+        if not result:
+            raise HTTPException(status_code=404)
+        return result
+
+    return app
+
+
+async def _load(app, cedulas, concurrency):
+    latencies = []
+    queue = list(cedulas)
+
+    async def worker(client):
+        while queue:
+            numero_cedula = queue.pop()
+            start = time.perf_counter()
+            response = await client.get(f"/electores/{numero_cedula}")
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(client) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+    return elapsed, np.array(latencies) * 1000
+
+
+async def _sample_cedulas(n):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(text(
+            "SELECT numero_cedula FROM electores TABLESAMPLE SYSTEM (1) LIMIT :n"
+        ), {'n': n})
+        return [row[0] for row in result]
+
+
+async def run(requests, concurrencies):
+    cedulas = await _sample_cedulas(requests)
+    if not cedulas:
+        raise SystemExit("La tabla electores está vacía")
+    random.shuffle(cedulas)
+
+    apps = {'sync_session': build_sync_app(), 'async_session': build_async_app()}
+    # Una pasada previa para abrir las conexiones de ambos pools
+    for app in apps.values():
+        await _load(app, cedulas[:50], max(concurrencies))
+
+    print(f"{'modo':<14} {'concurr.':>8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for concurrency in concurrencies:
+        throughput = {}
+        for mode, app in apps.items():
+            elapsed, latencies = await _load(app, cedulas, concurrency)
+            throughput[mode] = len(latencies) / elapsed
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            print(f"{mode:<14} {concurrency:>8} {throughput[mode]:>9,.0f} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f}")
+        print(f"{'':<14} {concurrency:>8} async/sync: {throughput['async_session'] / throughput['sync_session']:.1f}x")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput de la búsqueda por cédula con Session y AsyncSession")
+    parser.add_argument('--requests', type=int, default=2000, help="Peticiones por modo y nivel de concurrencia")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50],
+                        help="Peticiones simultáneas (por defecto: %(default)s)")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# Benchmark del formato de las entradas elector:cedula:* en Redis: JSON vs msgpack
+#
+# Uso: python -m benchmarks.bench_cache_codec --entries 100000
+#
+# No necesita Redis ni base de datos: mide tamaño por entrada y tiempo de
+# decodificación sobre detalles sintéticos con la forma que devuelve la API.
+import json
+import time
+import random
+import argparse
+from datetime import date, datetime
+
+from app.cache_codec import encode_elector_detail, decode_elector_detail
+from app.reference_data import ReferenceData
+from benchmarks.synthetic import APELLIDOS, NOMBRES
+
+
+def custom_serializer(obj):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f'Type {obj.__class__.__name__} not serializable')
+
+
+def synthetic_reference(rng):
+    geograficos = []
+    centros = []
+    for parroquia in range(1, 201):
+        geograficos.append({
+            'id': parroquia, 'codigo_estado': 1 + parroquia % 24, 'codigo_municipio': 1 + parroquia % 10,
+            'codigo_parroquia': parroquia, 'estado': f'EDO. {rng.choice(APELLIDOS)}',
+            'municipio': f'MP. {rng.choice(APELLIDOS)}', 'parroquia': f'PQ. {rng.choice(NOMBRES)}',
+        })
+    for centro in range(1, 2001):
+        geo = geograficos[centro % len(geograficos)]
+        centros.append({
+            'id': centro, 'codificacion_vieja_cv': centro, 'codificacion_nueva_cv': 10000 + centro, 'condicion': 1,
+            'codigo_estado': geo['codigo_estado'], 'codigo_municipio': geo['codigo_municipio'],
+            'codigo_parroquia': geo['codigo_parroquia'],
+            'nombre_cv': f'UNIDAD EDUCATIVA {rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}',
+            'direccion_cv': f'SECTOR {rng.choice(APELLIDOS)} CALLE {centro} FRENTE A LA PLAZA {rng.choice(NOMBRES)}, '
+                            f'AL LADO DE LA IGLESIA {rng.choice(APELLIDOS)}',
+        })
+    return ReferenceData(geograficos, centros)
+
+
+def synthetic_details(reference, entries, rng):
+    centros = list(reference.centros.values())
+    details = []
+    for i in range(entries):
+        centro = rng.choice(centros)
+        elector = {
+            'id': i + 1, 'letra_cedula': 'V', 'numero_cedula': 1_000_000 + i,
+            'p_apellido': rng.choice(APELLIDOS), 's_apellido': rng.choice(APELLIDOS),
+            'p_nombre': rng.choice(NOMBRES), 's_nombre': rng.choice(NOMBRES), 'sexo': rng.choice('MF'),
+            'fecha_nacimiento': date(rng.randint(1930, 2006), rng.randint(1, 12), rng.randint(1, 28)),
+            'codigo_estado': centro['codigo_estado'], 'codigo_municipio': centro['codigo_municipio'],
+            'codigo_parroquia': centro['codigo_parroquia'], 'codigo_centro_votacion': centro['codificacion_nueva_cv'],
+        }
+        details.append({
+            'elector': elector,
+            'centro_votacion': centro,
+            'geografico': reference.geografico(centro['codigo_estado'], centro['codigo_municipio'], centro['codigo_parroquia']),
+        })
+    return details
+
+
+def _measure(encoded, decode):
+    start = time.perf_counter()
+    for value in encoded:
+        decode(value)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara el tamaño y la decodificación de JSON y msgpack")
+    parser.add_argument('--entries', type=int, default=100000, help="Entradas sintéticas")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    reference = synthetic_reference(rng)
+    details = synthetic_details(reference, args.entries, rng)
+
+    encoded_json = [json.dumps(detail, default=custom_serializer).encode('utf-8') for detail in details]
+    encoded_msgpack = [encode_elector_detail(detail) for detail in details]
+
+    results = {
+        'json': (encoded_json, _measure(encoded_json, json.loads)),
+        'msgpack': (encoded_msgpack, _measure(encoded_msgpack, lambda v: decode_elector_detail(v, reference))),
+    }
+
+    print(f"{'formato':<8} {'bytes/entrada':>14} {'µs/decode':>10}")
+    for name, (encoded, elapsed) in results.items():
+        size = sum(len(value) for value in encoded) / len(encoded)
+        print(f"{name:<8} {size:>14.0f} {elapsed / len(encoded) * 1e6:>10.2f}")
+    ratio = sum(map(len, encoded_json)) / sum(map(len, encoded_msgpack))
+    print(f"Reducción de tamaño: {ratio:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
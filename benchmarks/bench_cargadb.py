@@ -0,0 +1,88 @@
+# Benchmark de carga de electores: ORM vs COPY vs COPY con parseo vectorizado
+#
+# Uso: python -m benchmarks.bench_cargadb --rows 1000000
+#
+# Las cargas se hacen sobre un esquema temporal (bench_cargadb) con una copia
+# vacía de la tabla electores, de modo que no se toca la tabla real.
+import os
+import time
+import argparse
+import tempfile
+import logging
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import engine
+from app.cargadb import load_electors, load_electors_copy, load_electors_vectorized
+from benchmarks.synthetic import generate_synthetic_file
+
+BENCH_SCHEMA = 'bench_cargadb'
+
+# Todas las conexiones del benchmark resuelven "electores" en el esquema temporal
+bench_engine = create_engine(engine.url, connect_args={'options': f'-csearch_path={BENCH_SCHEMA}'})
+BenchSession = sessionmaker(autocommit=False, autoflush=False, bind=bench_engine)
+
+
+def _prepare_schema():
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {BENCH_SCHEMA}"))
+        for table in ('electores', 'load_journal'):
+            conn.execute(text(
+                f"CREATE TABLE {BENCH_SCHEMA}.{table} (LIKE public.{table} INCLUDING ALL)"
+            ))
+
+
+def _drop_schema():
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE"))
+
+
+def _run(loader, filepath: str):
+    db = BenchSession()
+    try:
+        db.execute(text("TRUNCATE electores, load_journal"))
+        db.commit()
+        start = time.perf_counter()
+        loader(filepath, db)
+        elapsed = time.perf_counter() - start
+        loaded = db.execute(text("SELECT count(*) FROM electores")).scalar()
+        return elapsed, loaded
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara la carga de electores por ORM y por COPY")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Filas del archivo sintético")
+    parser.add_argument('--skip-orm', action='store_true', help="Mide solo el modo COPY")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = os.path.join(tmpdir, 'synthetic_electores.csv')
+        print(f"Generando archivo sintético de {args.rows:,} filas...")
+        generate_synthetic_file(filepath, args.rows)
+
+        _prepare_schema()
+        try:
+            results = {}
+            if not args.skip_orm:
+                results['orm'] = _run(load_electors, filepath)
+            results['copy'] = _run(load_electors_copy, filepath)
+            results['vectorized'] = _run(load_electors_vectorized, filepath)
+        finally:
+            bench_engine.dispose()
+            _drop_schema()
+
+    print(f"{'modo':<10} {'filas':>12} {'segundos':>10} {'filas/s':>12}")
+    for mode, (elapsed, loaded) in results.items():
+        print(f"{mode:<10} {loaded:>12,} {elapsed:>10.1f} {loaded / elapsed:>12,.0f}")
+    if 'orm' in results:
+        print(f"Aceleración COPY/ORM: {results['orm'][0] / results['copy'][0]:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
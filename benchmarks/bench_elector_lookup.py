@@ -0,0 +1,94 @@
+# Benchmark de la búsqueda de un elector por cédula: tres consultas ORM vs un JOIN
+#
+# Uso: python -m benchmarks.bench_elector_lookup --lookups 2000
+#
+# Es el trabajo que hacen /api/electores/cedula/{numero_cedula} (en un fallo de
+# caché) y /verificar_cedula por cada petición. Solo lee de la base de datos.
+import time
+import random
+import argparse
+
+import numpy as np
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.models import Elector, Geografico, CentroVotacion
+from app.elector_detail import get_elector_detail
+
+
+def to_dict(obj):
+    if not obj:
+        return None
+    return {c.key: getattr(obj, c.key) for c in obj.__table__.columns}
+
+
+def lookup_three_queries(db, numero_cedula):
+    # Implementación anterior de los endpoints
+    db_elector = db.query(Elector).filter(Elector.numero_cedula == numero_cedula).first()
+    if not db_elector:
+        return None
+    centro_votacion = db.query(CentroVotacion).filter(
+        CentroVotacion.codificacion_nueva_cv == db_elector.codigo_centro_votacion
+    ).first()
+    geografico = db.query(Geografico).filter(
+        Geografico.codigo_estado == db_elector.codigo_estado,
+        Geografico.codigo_municipio == db_elector.codigo_municipio,
+        Geografico.codigo_parroquia == db_elector.codigo_parroquia
+    ).first()
+    return {
+        "elector": to_dict(db_elector),
+        "centro_votacion": to_dict(centro_votacion),
+        "geografico": to_dict(geografico)
+    }
+
+
+def _run(lookup, cedulas):
+    latencies = []
+    db = SessionLocal()
+    try:
+        for numero_cedula in cedulas:
+            start = time.perf_counter()
+            lookup(db, numero_cedula)
+            latencies.append(time.perf_counter() - start)
+            # Igual que en la API: cada petición usa una sesión limpia
+            db.expunge_all()
+    finally:
+        db.close()
+    return np.array(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara la búsqueda por cédula en tres consultas y en una")
+    parser.add_argument('--lookups', type=int, default=2000, help="Búsquedas por modo")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        cedulas = [row[0] for row in db.execute(text(
+            "SELECT numero_cedula FROM electores TABLESAMPLE SYSTEM (1) LIMIT :n"
+        ), {'n': args.lookups})]
+    finally:
+        db.close()
+    if not cedulas:
+        raise SystemExit("La tabla electores está vacía")
+    random.shuffle(cedulas)
+
+    # Una pasada previa para calentar conexiones y caché de PostgreSQL
+    _run(get_elector_detail, cedulas[:100])
+    _run(lookup_three_queries, cedulas[:100])
+
+    results = {
+        'three_queries': _run(lookup_three_queries, cedulas),
+        'joined': _run(get_elector_detail, cedulas),
+    }
+
+    print(f"{'modo':<14} {'búsquedas':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for mode, latencies in results.items():
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"{mode:<14} {len(latencies):>10,} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f}")
+    speedup = np.median(results['three_queries']) / np.median(results['joined'])
+    print(f"Aceleración p50 joined/three_queries: {speedup:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# Benchmark del parseo de electores: conversión fila a fila vs vectorizada
+#
+# Uso: python -m benchmarks.bench_parse --rows 1000000
+#
+# No necesita base de datos: mide solo la conversión y validación de los lotes
+# que luego se insertan.
+import os
+import csv
+import time
+import argparse
+import tempfile
+from datetime import datetime
+
+from app.parse_electores import parse_elector_chunk
+from benchmarks.synthetic import generate_synthetic_file
+
+
+def parse_per_row(lines):
+    # Misma conversión que hace la carga por ORM para cada fila
+    rows = []
+    for row in csv.reader(lines):
+        rows.append((
+            row[0],
+            int(row[1]),
+            row[2],
+            row[3],
+            row[4],
+            row[5],
+            row[6],
+            datetime.strptime(row[7], '%Y-%m-%d'),
+            int(row[8]),
+            int(row[9]),
+            int(row[10]),
+            int(row[11])
+        ))
+    return rows
+
+
+def parse_vectorized(lines):
+    valid, _ = parse_elector_chunk(lines)
+    return valid
+
+
+def _iter_batches(filepath: str, batch_size: int):
+    with open(filepath, 'r', encoding='utf-8', newline='') as file:
+        next(file)  # Skip the header
+        batch = []
+        for line in file:
+            batch.append(line)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def _run(parse, batches):
+    start = time.perf_counter()
+    parsed = sum(len(parse(batch)) for batch in batches)
+    return time.perf_counter() - start, parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara el parseo fila a fila con el vectorizado")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Filas del archivo sintético")
+    parser.add_argument('--batch-size', type=int, default=100000, help="Filas por lote")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = os.path.join(tmpdir, 'synthetic_electores.csv')
+        print(f"Generando archivo sintético de {args.rows:,} filas...")
+        generate_synthetic_file(filepath, args.rows)
+        # Los lotes se leen antes de medir para no contar la lectura del disco
+        batches = list(_iter_batches(filepath, args.batch_size))
+
+    results = {
+        'per_row': _run(parse_per_row, batches),
+        'vectorized': _run(parse_vectorized, batches),
+    }
+
+    print(f"{'modo':<10} {'filas':>12} {'segundos':>10} {'filas/s':>12}")
+    for mode, (elapsed, parsed) in results.items():
+        print(f"{mode:<10} {parsed:>12,} {elapsed:>10.2f} {parsed / elapsed:>12,.0f}")
+    print(f"Aceleración vectorizado/fila a fila: {results['per_row'][0] / results['vectorized'][0]:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
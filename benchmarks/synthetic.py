@@ -0,0 +1,36 @@
+# Generador del archivo sintético de electores que usan los benchmarks
+import csv
+import random
+from datetime import date, timedelta
+
+HEADER = [
+    'letra_cedula', 'numero_cedula', 'p_apellido', 's_apellido', 'p_nombre', 's_nombre',
+    'sexo', 'fecha_nacimiento', 'codigo_estado', 'codigo_municipio', 'codigo_parroquia',
+    'codigo_centro_votacion'
+]
+
+APELLIDOS = ['GONZALEZ', 'RODRIGUEZ', 'PEREZ', 'HERNANDEZ', 'GARCIA', 'MARTINEZ', 'LOPEZ', 'DIAZ']
+NOMBRES = ['JOSE', 'MARIA', 'LUIS', 'CARMEN', 'CARLOS', 'ANA', 'JESUS', 'ROSA', '']
+
+
+def generate_synthetic_file(filepath: str, rows: int, seed: int = 42):
+    rng = random.Random(seed)
+    base_date = date(1940, 1, 1)
+    with open(filepath, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(HEADER)
+        for i in range(rows):
+            writer.writerow([
+                'V' if rng.random() < 0.95 else 'E',
+                1000000 + i,
+                rng.choice(APELLIDOS),
+                rng.choice(APELLIDOS),
+                rng.choice(NOMBRES[:-1]),
+                rng.choice(NOMBRES),
+                rng.choice('MF'),
+                (base_date + timedelta(days=rng.randrange(25000))).isoformat(),
+                rng.randint(1, 24),
+                rng.randint(1, 25),
+                rng.randint(1, 20),
+                rng.randint(10000000, 99999999),
+            ])
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from app.cache_codec import ELECTOR_FIELDS_V1, decode_elector_detail, encode_elector_detail
+from app.reference_data import ReferenceData
+
+ELECTOR = dict(zip(ELECTOR_FIELDS_V1, [
+    1, 'V', 10, 'PEREZ', 'GOMEZ', 'ANA', None, 'F', '1990-01-01', 1, 2, 3, 100,
+]))
+
+
+def test_round_trip_resolves_reference_data():
+    reference = ReferenceData(
+        [{'codigo_estado': 1, 'codigo_municipio': 2, 'codigo_parroquia': 3,
+          'estado': 'E', 'municipio': 'M', 'parroquia': 'P'}],
+        [],
+    )
+
+    data = encode_elector_detail({'elector': ELECTOR, 'centro_votacion': {'ignored': True}})
+    detail = decode_elector_detail(data, reference)
+
+    assert data[0] == 1
+    assert detail['elector'] == ELECTOR
+    assert detail['geografico']['parroquia'] == 'P'
+    assert detail['centro_votacion'] is None
+
+
+def test_legacy_json_entries_are_still_read():
+    legacy = {'elector': ELECTOR, 'centro_votacion': None, 'geografico': None}
+
+    assert decode_elector_detail(json.dumps(legacy).encode(), ReferenceData([], [])) == legacy
+
+
+def test_unknown_version_is_rejected():
+    with pytest.raises(ValueError):
+        decode_elector_detail(bytes([9]) + b'\x90', ReferenceData([], []))
@@ -0,0 +1,72 @@
+from datetime import date
+
+from app.cache_codec import decode_elector_detail, encode_elector_detail
+from app.cache_keys import elector_cedula_key, elector_missing_key
+from app.cache_warmup import read_cedulas_file, write_batch
+from app.reference_data import ReferenceData
+
+
+class _FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def mset(self, entries):
+        self.commands.append(('mset', dict(entries)))
+
+    def expire(self, key, ttl):
+        self.commands.append(('expire', key, ttl))
+
+    def delete(self, *keys):
+        self.commands.append(('delete', keys))
+
+    def execute(self):
+        self.client.executed.append(self.commands)
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.executed = []
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+def _elector(numero_cedula):
+    return {
+        'id': numero_cedula, 'letra_cedula': 'V', 'numero_cedula': numero_cedula,
+        'p_apellido': 'PEREZ', 's_apellido': 'GOMEZ', 'p_nombre': 'ANA', 's_nombre': 'MARIA',
+        'sexo': 'F', 'fecha_nacimiento': date(1990, 1, 1), 'codigo_estado': 1,
+        'codigo_municipio': 2, 'codigo_parroquia': 3, 'codigo_centro_votacion': 100,
+    }
+
+
+def test_read_cedulas_file_dedupes_and_skips_garbage(tmp_path):
+    path = tmp_path / 'cedulas.txt'
+    path.write_text('30\n10\n\nV-20\n 10 \nabc\n', encoding='utf-8')
+
+    assert read_cedulas_file(str(path)) == [10, 30]
+
+
+def test_write_batch_uses_one_pipeline_per_batch():
+    client = _FakeRedis()
+    batch = {numero: encode_elector_detail({'elector': _elector(numero)}) for numero in (10, 20)}
+
+    write_batch(client, batch, ttl=60, generation=7)
+
+    assert len(client.executed) == 1
+    commands = client.executed[0]
+    assert commands[0] == ('mset', {elector_cedula_key(7, 10): batch[10], elector_cedula_key(7, 20): batch[20]})
+    assert ('expire', elector_cedula_key(7, 20), 60) in commands
+    # Una entrada negativa de la misma generación no puede tapar el detalle recién escrito
+    assert commands[-1] == ('delete', (elector_missing_key(7, 10), elector_missing_key(7, 20)))
+
+
+def test_warmed_entry_is_readable_by_the_api():
+    reference = ReferenceData([], [{'codificacion_nueva_cv': 100, 'codigo_estado': 1, 'codigo_municipio': 2,
+                                    'codigo_parroquia': 3, 'nombre_cv': 'LICEO', 'id': 1}])
+
+    detail = decode_elector_detail(encode_elector_detail({'elector': _elector(10)}), reference)
+
+    assert detail['elector']['fecha_nacimiento'] == '1990-01-01'
+    assert detail['centro_votacion']['nombre_cv'] == 'LICEO'
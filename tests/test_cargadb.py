@@ -0,0 +1,87 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.cargadb import REJECTS_SUFFIX, list_split_files, load_electors_batched
+from app.models import LoadJournal
+from app.parse_electores import RejectWriter, parse_elector_chunk
+
+VALID = 'V,10,PEREZ,GOMEZ,ANA,MARIA,F,1990-01-01,1,2,3,4\n'
+
+
+@pytest.fixture
+def db():
+    engine = create_engine('sqlite://')
+    LoadJournal.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def test_parse_elector_chunk_rejects_with_reason():
+    valid, rejects = parse_elector_chunk([
+        VALID,
+        'V,abc,PEREZ,GOMEZ,ANA,MARIA,F,1990-01-01,1,2,3,4\n',
+        'X,11,PEREZ,GOMEZ,ANA,MARIA,F,1990-13-01,1,2,3,4\n',
+        'V,12,PEREZ\n',
+    ])
+
+    assert valid['numero_cedula'].tolist() == [10]
+    assert rejects['motivo'].tolist() == [
+        'numero_cedula no es un entero',
+        'fecha_nacimiento inválida; letra_cedula inválida',
+        'número de columnas inválido',
+    ]
+
+
+def test_list_split_files_ignores_rejects_and_other_files(tmp_path):
+    for name in ('part_10.csv', 'part_2.csv', f'part_1.csv{REJECTS_SUFFIX}', 'part_1.csv.rejects.csv', 'notes.csv'):
+        (tmp_path / name).write_text(VALID)
+
+    assert [p.rsplit('/', 1)[-1] for p in list_split_files(str(tmp_path))] == ['part_2.csv', 'part_10.csv']
+
+
+def _write_part(path, lines):
+    path.write_text('header\n' + ''.join(lines), encoding='utf-8')
+
+
+def test_rejects_are_not_repeated_when_a_load_resumes(tmp_path, db):
+    part = tmp_path / 'part_1.csv'
+    bad = 'V,abc,PEREZ,GOMEZ,ANA,MARIA,F,1990-01-01,1,2,3,4\n'
+    _write_part(part, [VALID, bad, VALID, bad])
+    rejects = RejectWriter(f"{part}{REJECTS_SUFFIX}")
+    fail_on_batch = [2]
+
+    def insert_batch(lines, db):
+        valid, rejected = parse_elector_chunk(lines)
+        rejects.stage(rejected)
+        fail_on_batch[0] -= 1
+        if fail_on_batch[0] == 0:
+            raise RuntimeError('connection lost')
+        return len(valid)
+
+    with pytest.raises(RuntimeError):
+        load_electors_batched(str(part), db, insert_batch, 'utf-8', batch_size=2, rejects=rejects)
+    # El segundo lote se vuelve a leer al reanudar: sus rechazos solo se escriben una vez
+    load_electors_batched(str(part), db, insert_batch, 'utf-8', batch_size=2, rejects=rejects)
+
+    written = pd.read_csv(rejects.path)
+    assert len(written) == 2
+    assert db.query(LoadJournal).one().filas == 2
+
+
+def test_reload_from_start_truncates_previous_rejects(tmp_path, db):
+    part = tmp_path / 'part_1.csv'
+    _write_part(part, ['V,abc,PEREZ,GOMEZ,ANA,MARIA,F,1990-01-01,1,2,3,4\n'])
+    stale = tmp_path / f'part_1.csv{REJECTS_SUFFIX}'
+    stale.write_text('linea,motivo\nvieja,motivo\n')
+    rejects = RejectWriter(str(stale))
+
+    def insert_batch(lines, db):
+        valid, rejected = parse_elector_chunk(lines)
+        rejects.stage(rejected)
+        return len(valid)
+
+    load_electors_batched(str(part), db, insert_batch, 'utf-8', rejects=rejects)
+
+    assert pd.read_csv(stale)['motivo'].tolist() == ['numero_cedula no es un entero']
@@ -0,0 +1,154 @@
+import asyncio
+
+import numpy as np
+
+from app.cache_keys import CacheGeneration
+from app.cedula_filter import BloomFilter, CedulaFilterState
+from app.local_cache import INVALIDATE_ALL, LocalCache, listen_for_invalidations
+
+
+def _bloom(cedulas):
+    bloom = BloomFilter(len(cedulas), fp_rate=0.01)
+    bloom.add_many(cedulas)
+    return bloom
+
+
+def test_bloom_filter_has_no_false_negatives():
+    cedulas = np.arange(1_000_000, 1_050_000, dtype=np.int64)
+    bloom = _bloom(cedulas)
+
+    assert all(int(cedula) in bloom for cedula in cedulas[::97])
+    false_positives = sum(1 for cedula in range(2_000_000, 2_010_000) if cedula in bloom)
+    assert false_positives < 300
+
+
+def test_filter_from_another_generation_does_not_discard():
+    state = CedulaFilterState()
+    asyncio.run(state.rebuild(lambda: _bloom([10, 20]), generation=3))
+
+    assert state.definitely_missing(30, generation=3)
+    assert not state.definitely_missing(10, generation=3)
+    # Un padrón nuevo puede traer la cédula 30: hasta reconstruir no se descarta
+    assert not state.definitely_missing(30, generation=4)
+
+
+def test_failed_rebuild_leaves_filter_unusable():
+    state = CedulaFilterState()
+    asyncio.run(state.rebuild(lambda: _bloom([10]), generation=1))
+
+    def fail():
+        raise RuntimeError('database down')
+
+    assert not asyncio.run(state.rebuild(fail, generation=2))
+    assert not state.definitely_missing(30, generation=1)
+    assert not state.building
+
+
+class _FakeRedis:
+    def __init__(self, value=None):
+        self.value = value
+
+    async def get(self, key):
+        if isinstance(self.value, Exception):
+            raise self.value
+        return self.value
+
+
+def test_generation_watch_calls_on_refresh_even_when_redis_fails():
+    async def run():
+        calls = []
+        generation = CacheGeneration()
+
+        async def on_refresh():
+            calls.append(generation.value)
+            if len(calls) == 2:
+                raise asyncio.CancelledError
+
+        redis = _FakeRedis(ConnectionError('redis down'))
+        task = asyncio.create_task(generation.watch(redis, interval=0, on_refresh=on_refresh))
+        await asyncio.sleep(0)
+        redis.value = '7'
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return calls
+
+    assert asyncio.run(run()) == [0, 7]
+
+
+class _FakePubSub:
+    def __init__(self, messages, fail):
+        self.messages = messages
+        self.fail = fail
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def subscribe(self, channel):
+        pass
+
+    async def listen(self):
+        for message in self.messages:
+            yield {'type': 'message', 'data': message}
+        if self.fail:
+            raise ConnectionError('connection lost')
+        await asyncio.Event().wait()
+
+
+class _FakePubSubRedis:
+    def __init__(self, sessions):
+        self.sessions = list(sessions)
+
+    def pubsub(self):
+        return self.sessions.pop(0)
+
+
+def test_listener_rebuilds_after_reconnect(monkeypatch):
+    monkeypatch.setattr(asyncio, 'sleep', _no_sleep)
+
+    async def run():
+        rebuilds = []
+
+        async def on_invalidate_all():
+            rebuilds.append('rebuild')
+
+        redis = _FakePubSubRedis([
+            _FakePubSub(['elector:g1:cedula:1'], fail=True),
+            _FakePubSub([], fail=False),
+        ])
+        task = asyncio.create_task(listen_for_invalidations(redis, LocalCache(), on_invalidate_all))
+        for _ in range(10):
+            await _real_sleep(0)
+        task.cancel()
+        return rebuilds
+
+    # Sin INVALIDATE_ALL: la reconstrucción se debe solo a la reconexión
+    assert asyncio.run(run()) == ['rebuild']
+
+
+def test_listener_rebuilds_on_invalidate_all():
+    async def run():
+        rebuilds = []
+
+        async def on_invalidate_all():
+            rebuilds.append('rebuild')
+
+        redis = _FakePubSubRedis([_FakePubSub([INVALIDATE_ALL], fail=False)])
+        task = asyncio.create_task(listen_for_invalidations(redis, LocalCache(), on_invalidate_all))
+        for _ in range(10):
+            await asyncio.sleep(0)
+        task.cancel()
+        return rebuilds
+
+    assert asyncio.run(run()) == ['rebuild']
+
+
+_real_sleep = asyncio.sleep
+
+
+async def _no_sleep(delay, *args):
+    await _real_sleep(0)
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from app.delta_import import ELECTOR_COLUMNS, build_signature, compare_signatures, normalize_chunk
+
+
+def _row(cedula, codigo_estado='1', p_nombre='ANA'):
+    return ['V', cedula, 'PEREZ', 'GOMEZ', p_nombre, 'MARIA', 'F', '1990-01-01', codigo_estado, '2', '3', '4']
+
+
+def _chunk(rows):
+    return pd.DataFrame(rows, columns=list(ELECTOR_COLUMNS), dtype=str)
+
+
+def _delta(snapshot_rows, table_rows):
+    new_cedulas, new_hashes, _, _, held = build_signature([_chunk(snapshot_rows)])
+    old_cedulas, old_hashes, _, _, _ = build_signature([_chunk(table_rows)])
+    return compare_signatures(new_cedulas, new_hashes, old_cedulas, old_hashes, held)
+
+
+def test_normalize_chunk_rejects_unparseable_rows():
+    valid, rejects, held = normalize_chunk(_chunk([
+        _row('10'), _row(''), _row('abc'), _row('-5'), _row('11', codigo_estado='X'),
+    ]))
+
+    assert valid['numero_cedula'].tolist() == [10]
+    assert len(rejects) == 4
+    assert held.tolist() == [11]
+
+
+def test_blank_codes_stay_null_and_match_table_nulls():
+    valid, rejects, _ = normalize_chunk(_chunk([_row('10', codigo_estado='')]))
+
+    assert rejects.empty
+    assert valid['codigo_estado'].isna().all()
+    assert _delta([_row('10', codigo_estado='')], [_row('10', codigo_estado='')])['unchanged'] == 1
+
+
+def test_rejected_row_does_not_remove_existing_elector():
+    delta = _delta([_row('123', codigo_estado='X')], [_row('123')])
+
+    assert delta['removals'].tolist() == []
+    assert delta['updates'].tolist() == []
+    assert delta['inserts'].tolist() == []
+
+
+def test_rejected_row_for_new_cedula_is_not_inserted():
+    delta = _delta([_row('10'), _row('20', codigo_estado='X')], [_row('10')])
+
+    assert delta['inserts'].tolist() == []
+    assert delta['unchanged'] == 1
+
+
+def test_compare_signatures_classifies_changes():
+    delta = _delta(
+        [_row('10'), _row('20', p_nombre='LUIS'), _row('30')],
+        [_row('10'), _row('20'), _row('40')],
+    )
+
+    assert delta['inserts'].tolist() == [30]
+    assert delta['updates'].tolist() == [20]
+    assert delta['removals'].tolist() == [40]
+    assert delta['unchanged'] == 1
+    assert isinstance(delta['inserts'], np.ndarray)
@@ -0,0 +1,48 @@
+import json
+import os
+
+from app import file_encoding
+from app.file_encoding import CACHE_VERSION, DEFAULT_ENCODING, detect_encoding, get_cached_encoding, remember_encoding
+
+
+def _clear_memory(monkeypatch):
+    monkeypatch.setattr(file_encoding, '_memory_cache', {})
+
+
+def test_ascii_sample_falls_back_to_default(tmp_path):
+    path = tmp_path / 'part_1.csv'
+    path.write_bytes(b'letra,cedula\nV,10\n')
+
+    assert detect_encoding(str(path)) == DEFAULT_ENCODING
+
+
+def test_each_file_keeps_its_own_cache_entry(tmp_path, monkeypatch):
+    first, second = tmp_path / 'part_1.csv', tmp_path / 'part_2.csv'
+    first.write_text('a\n')
+    second.write_text('b\n')
+
+    remember_encoding(str(first), 'utf-8')
+    remember_encoding(str(second), 'latin-1')
+    _clear_memory(monkeypatch)
+
+    # Escrituras de distintos archivos no se pisan: cada uno tiene su propio archivo de caché
+    assert get_cached_encoding(str(first)) == 'utf-8'
+    assert get_cached_encoding(str(second)) == 'latin-1'
+    assert sorted(os.listdir(tmp_path)) == ['.part_1.csv.encoding', '.part_2.csv.encoding', 'part_1.csv', 'part_2.csv']
+
+
+def test_entry_is_ignored_when_file_or_version_changes(tmp_path, monkeypatch):
+    path = tmp_path / 'part_1.csv'
+    path.write_text('a\n')
+    remember_encoding(str(path), 'utf-8')
+    _clear_memory(monkeypatch)
+
+    path.write_text('ab\n')
+    assert get_cached_encoding(str(path)) is None
+
+    remember_encoding(str(path), 'utf-8')
+    _clear_memory(monkeypatch)
+    sidecar = tmp_path / '.part_1.csv.encoding'
+    entry = json.loads(sidecar.read_text())
+    sidecar.write_text(json.dumps({**entry, 'version': CACHE_VERSION - 1}))
+    assert get_cached_encoding(str(path)) is None
@@ -0,0 +1,43 @@
+import time
+
+import pytest
+
+from app.green_api import GreenAPIGateway, GreenAPIInstance, load_instances
+
+
+def _gateway(names, balancing='hash'):
+    return GreenAPIGateway([GreenAPIInstance(name, f'https://api/waInstance{name}', 'token') for name in names],
+                           balancing=balancing)
+
+
+def test_load_instances_parses_spec_and_falls_back_to_default():
+    instances = load_instances('https://api/waInstance1', 'tok', 'a:x, b:y@https://other/')
+    assert [(i.name, i.url('sendMessage')) for i in instances] == [
+        ('a', 'https://7103.api.greenapi.com/waInstancea/sendMessage/x'),
+        ('b', 'https://other/waInstanceb/sendMessage/y'),
+    ]
+    assert [i.name for i in load_instances('https://api/waInstance1', 'tok', '')] == ['1']
+    with pytest.raises(ValueError):
+        load_instances('https://api/waInstance1', 'tok', 'sin_token')
+
+
+def test_rendezvous_only_moves_recipients_of_the_removed_instance():
+    recipients = [f'58412{n:07d}@c.us' for n in range(500)]
+    before = {r: _gateway(['a', 'b', 'c']).choose('sendMessage', r).name for r in recipients}
+    gateway = _gateway(['a', 'b', 'c'])
+    gateway.instance('b').unhealthy_until = time.monotonic() + 60
+    after = {r: gateway.choose('sendMessage', r).name for r in recipients}
+
+    assert set(before.values()) == {'a', 'b', 'c'}
+    assert all(after[r] == before[r] for r in recipients if before[r] != 'b')
+    assert all(after[r] != 'b' for r in recipients)
+
+
+def test_non_send_methods_use_first_healthy_instance():
+    gateway = _gateway(['a', 'b'])
+    gateway.instance('a').unhealthy_until = time.monotonic() + 60
+
+    assert gateway.choose('checkWhatsapp').name == 'b'
+    # Todas apartadas: la que antes vuelve
+    gateway.instance('b').unhealthy_until = time.monotonic() + 120
+    assert gateway.choose('sendMessage', 'x').name == 'a'
@@ -0,0 +1,42 @@
+import numpy as np
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app import load_data
+from app.load_data import CedulaBitmap, load_electors, load_existing_cedulas
+from app.models import Elector
+
+HEADER = 'letra,cedula,p_apellido,s_apellido,p_nombre,s_nombre,sexo,fecha,estado,municipio,parroquia,centro\n'
+
+
+def _part(path, cedulas):
+    path.write_text(HEADER + ''.join(
+        f'V,{cedula},PEREZ,GOMEZ,ANA,MARIA,F,1990-01-01,1,2,3,4\n' for cedula in cedulas
+    ), encoding='utf-8')
+    return str(path)
+
+
+def test_cedula_bitmap_add_contains_discard():
+    bitmap = CedulaBitmap()
+    bitmap.add(np.array([5, 70_000_000]))
+
+    assert bitmap.contains(np.array([5, 6, 70_000_000, -1])).tolist() == [True, False, True, False]
+    bitmap.discard(np.array([5]))
+    assert bitmap.contains(np.array([5, 70_000_000])).tolist() == [False, True]
+
+
+def test_shared_bitmap_dedupes_across_parts_without_rescanning(tmp_path, monkeypatch):
+    engine = create_engine('sqlite://')
+    Elector.__table__.create(engine)
+    with Session(engine) as db:
+        existing = load_existing_cedulas(db)
+        monkeypatch.setattr(load_data, 'load_existing_cedulas', lambda db: (_ for _ in ()).throw(
+            AssertionError('electores scanned again')
+        ))
+
+        load_electors(_part(tmp_path / 'part_1.csv', [1, 2, 2]), db, 'utf-8', existing=existing)
+        load_electors(_part(tmp_path / 'part_2.csv', [2, 3]), db, 'utf-8', existing=existing)
+
+        cedulas = db.scalars(select(Elector.numero_cedula).order_by(Elector.numero_cedula)).all()
+        assert cedulas == [1, 2, 3]
+        assert db.scalar(select(func.count()).select_from(Elector)) == 3
@@ -0,0 +1,30 @@
+from app.reference_data import ReferenceData
+
+
+def _centro(id, codigo, nombre, parroquia=3):
+    return {
+        'id': id, 'codificacion_nueva_cv': codigo, 'codificacion_vieja_cv': codigo, 'condicion': 1,
+        'codigo_estado': 1, 'codigo_municipio': 2, 'codigo_parroquia': parroquia,
+        'nombre_cv': nombre, 'direccion_cv': None,
+    }
+
+
+def test_centros_en_keeps_first_name_per_code():
+    data = ReferenceData([], [
+        _centro(1, 200, 'ZULIA'),
+        _centro(2, 100, 'LICEO B'),
+        _centro(3, 100, 'LICEO A'),
+        _centro(4, 200, None),
+    ])
+
+    centros = data.centros_en(1, 2, 3)
+    assert [(c['codificacion_nueva_cv'], c['nombre_cv']) for c in centros] == [(100, 'LICEO A'), (200, 'ZULIA')]
+    # La búsqueda por código sigue devolviendo la fila de menor id, como el .first() original
+    assert data.centro(100)['id'] == 2
+
+
+def test_centros_en_dedupes_within_each_location():
+    data = ReferenceData([], [_centro(1, 100, 'B', parroquia=3), _centro(2, 100, 'A', parroquia=4)])
+
+    assert [c['id'] for c in data.centros_en(1, 2, 3)] == [1]
+    assert [c['id'] for c in data.centros_en(1, 2, 4)] == [2]
@@ -0,0 +1,64 @@
+import asyncio
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.send_scheduler import PRIORITY_BROADCAST, PRIORITY_TICKET, SendScheduler
+
+
+class _FakeSharedBucket:
+    key = 'green_api:send_bucket:test'
+
+    def __init__(self, waits):
+        self.waits = list(waits)
+        self.calls = 0
+
+    async def take(self, rate, burst):
+        self.calls += 1
+        wait = self.waits.pop(0) if self.waits else 0.0
+        if isinstance(wait, Exception):
+            raise wait
+        return wait
+
+
+def test_burst_is_served_without_waiting():
+    async def run():
+        scheduler = SendScheduler(rate=1, burst=3)
+        return [await scheduler.acquire() for _ in range(3)]
+
+    assert asyncio.run(run()) == [0.0, 0.0, 0.0]
+
+
+def test_ticket_lane_goes_before_queued_broadcasts():
+    async def run():
+        scheduler = SendScheduler(rate=1000, burst=1)
+        await scheduler.acquire(PRIORITY_BROADCAST)
+        order = []
+
+        async def send(priority, name):
+            await scheduler.acquire(priority)
+            order.append(name)
+
+        tasks = [asyncio.create_task(send(PRIORITY_BROADCAST, f'broadcast{i}')) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(send(PRIORITY_TICKET, 'ticket')))
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(run())[0] == 'ticket'
+
+
+def test_shared_bucket_limits_and_falls_back_to_local_when_redis_fails():
+    async def run():
+        shared = _FakeSharedBucket([0.0, RedisConnectionError('down'), 0.0])
+        scheduler = SendScheduler(rate=1, burst=1, shared=shared)
+        await scheduler.acquire()
+        # Redis no responde: sale con el token local
+        await scheduler.acquire()
+        down = scheduler.stats()
+        await scheduler.acquire()
+        return shared.calls, down, scheduler.stats()
+
+    calls, down, up = asyncio.run(run())
+    assert calls == 3
+    assert down['shared_available'] is False and down['shared_errors'] == 1
+    assert up['shared_available'] is True